@@ -0,0 +1,144 @@
+"""
+ANN Index Module
+Bhruhat Trayi AI Assistant by PraKul
+
+Approximate nearest-neighbour search over the śloka embeddings using an
+inverted-file (IVF) index built with pure NumPy:
+1. Spherical k-means splits the (normalized) vectors into n_lists clusters
+2. A query only scans the vectors of its nprobe closest clusters
+3. Results are exact cosine scores of the scanned candidates
+
+Tuning knobs:
+- n_lists (build time): more lists = smaller scans, needs higher nprobe
+- nprobe (query time): more probed lists = higher recall, more latency
+"""
+
+import numpy as np
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from vector_store import VectorStore, normalize_query_vector, normalize_rows, top_k_indices
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+DEFAULT_NPROBE = 16
+KMEANS_ITERATIONS = 15
+KMEANS_POINTS_PER_LIST = 64   # Training sample size per cluster
+ASSIGN_CHUNK_SIZE = 8192      # Rows assigned per matrix product
+
+
+# =============================================================================
+# IVF INDEX CLASS
+# =============================================================================
+
+class IVFIndex:
+    """Inverted-file index: centroids + one posting list of row ids per centroid"""
+
+    def __init__(self, centroids: np.ndarray, list_offsets: np.ndarray, list_ids: np.ndarray):
+        self.centroids = centroids.astype(np.float32)
+        self.list_offsets = list_offsets.astype(np.int64)
+        self.list_ids = list_ids.astype(np.int64)
+
+    @property
+    def n_lists(self) -> int:
+        return self.centroids.shape[0]
+
+    @property
+    def n_vectors(self) -> int:
+        return len(self.list_ids)
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, n_lists: Optional[int] = None,
+              n_iter: int = KMEANS_ITERATIONS, seed: int = 42) -> "IVFIndex":
+        """Train centroids with spherical k-means and assign every vector"""
+        vectors = normalize_rows(np.asarray(vectors, dtype=np.float32))
+        n = vectors.shape[0]
+        if n_lists is None:
+            n_lists = default_n_lists(n)
+        n_lists = max(1, min(n_lists, n))
+
+        rng = np.random.default_rng(seed)
+        sample_size = min(n, n_lists * KMEANS_POINTS_PER_LIST)
+        sample = vectors[rng.choice(n, sample_size, replace=False)]
+
+        centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+        for _ in range(n_iter):
+            assignments = _assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            counts = np.bincount(assignments, minlength=n_lists)
+
+            # Re-seed empty clusters with random sample points
+            empty = counts == 0
+            if empty.any():
+                sums[empty] = sample[rng.choice(sample_size, int(empty.sum()), replace=False)]
+            centroids = normalize_rows(sums)
+
+        assignments = _assign(vectors, centroids)
+        order = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=n_lists)
+        list_offsets = np.concatenate([[0], np.cumsum(counts)])
+
+        return cls(centroids, list_offsets, order)
+
+    def candidates(self, query: np.ndarray, nprobe: int = DEFAULT_NPROBE) -> np.ndarray:
+        """Row ids stored in the nprobe lists closest to the query"""
+        nprobe = max(1, min(nprobe, self.n_lists))
+        probed = top_k_indices(self.centroids @ query, nprobe)
+        return np.concatenate([
+            self.list_ids[self.list_offsets[c]:self.list_offsets[c + 1]] for c in probed
+        ])
+
+    def search(self, store: VectorStore, query_embedding: np.ndarray, top_k: int = 50,
+               nprobe: int = DEFAULT_NPROBE, mask: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """
+        Approximate top_k (row, similarity) pairs from the store's vectors
+
+        mask: optional boolean array; rows where it is False are skipped.
+        If the probed lists hold fewer than top_k allowed rows, nprobe is
+        doubled until they do (or every list has been probed).
+        """
+        query = normalize_query_vector(query_embedding)
+        while True:
+            rows = self.candidates(query, nprobe)
+            if mask is not None:
+                rows = rows[mask[rows]]
+            if len(rows) >= top_k or nprobe >= self.n_lists:
+                break
+            nprobe *= 2
+
+        # Sorted rows = sequential reads from a memory-mapped matrix
+        rows = np.sort(rows)
+        return store.select(rows, store.score_rows(rows, query), query, top_k)
+
+    def save(self, path: Path):
+        """Save index arrays to a .npz file"""
+        np.savez(path, centroids=self.centroids, list_offsets=self.list_offsets,
+                 list_ids=self.list_ids)
+
+    @classmethod
+    def load(cls, path: Path) -> "IVFIndex":
+        """Load an index saved with save()"""
+        with np.load(path) as data:
+            return cls(data["centroids"], data["list_offsets"], data["list_ids"])
+
+
+# =============================================================================
+# HELPER FUNCTIONS
+# =============================================================================
+
+def default_n_lists(n_vectors: int) -> int:
+    """Rule of thumb: about 4 * sqrt(n) lists"""
+    return max(1, int(4 * np.sqrt(n_vectors)))
+
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Closest centroid (by cosine) for each vector, computed in chunks"""
+    assignments = np.empty(vectors.shape[0], dtype=np.int64)
+    for start in range(0, vectors.shape[0], ASSIGN_CHUNK_SIZE):
+        chunk = vectors[start:start + ASSIGN_CHUNK_SIZE]
+        assignments[start:start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+    return assignments
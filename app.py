@@ -23,6 +23,7 @@ from typing import List, Tuple, Dict
 from datetime import datetime
 import base64
 import io
+import time
 
 # =============================================================================
 # PAGE CONFIG (Must be first Streamlit command)
@@ -54,7 +55,9 @@ from prompt_templates import (
     get_role_icons
 )
 from query_analyzer import QueryAnalyzer, analyze_query
-from enhanced_search import EnhancedSearch, enhanced_search
+from enhanced_search import EnhancedSearch, enhanced_search, get_search_engine, get_loaded_search_engine
+from warmup import WarmupState, start_warmup
+from corpus_store import CorpusStore
 
 # Query disambiguation
 try:
@@ -104,6 +107,9 @@ PARQUET_PATH = APP_DIR / "all3_cleaned.parquet"
 EXCEL_PATH = APP_DIR / "all3_cleaned.xlsx"
 LOGO_PATH = APP_DIR / "Atharva_Logo.jpg"
 
+# Minimum seconds between redraws of a streaming chat answer
+STREAM_RENDER_INTERVAL = 0.05
+
 # =============================================================================
 # CUSTOM CSS - Enhanced Styling
 # =============================================================================
@@ -440,6 +446,7 @@ def init_session_state():
         'chat_context_query': "",
         'chat_context_role': "Student",
         'gemini_chat': None,
+        'chat_needs_start': False,
         'search_results': None,
         'selected_roles': ["Student"],
         'selected_samhitas': ["Charaka Samhita", "Sushruta Samhita", "Astanga Hrudaya"],
@@ -457,18 +464,54 @@ def init_session_state():
 # DATA LOADING WITH CACHING (Performance Fix)
 # =============================================================================
 
-@st.cache_data(ttl=3600, show_spinner=False)
 def load_database():
-    """Load the database with caching for performance"""
+    """
+    Read the database file (not cached: the process keeps only the
+    CorpusStore and the search engine's reference columns)
+    """
     if PARQUET_PATH.exists():
         return pd.read_parquet(PARQUET_PATH)
     elif EXCEL_PATH.exists():
         return pd.read_excel(EXCEL_PATH)
     else:
-        st.error("❌ Database not found! Place all3_cleaned.parquet in app folder.")
+        raise FileNotFoundError("Database not found! Place all3_cleaned.parquet in app folder.")
+
+
+def get_database_stamp():
+    """Modification time of the database file (changes invalidate the engine)"""
+    for path in (PARQUET_PATH, EXCEL_PATH):
+        if path.exists():
+            return path.stat().st_mtime_ns
+    return None
+
+
+@st.cache_resource(show_spinner=False)
+def _load_corpus(database_stamp) -> CorpusStore:
+    """Columnar copy of the database used for rendering, shared across sessions"""
+    return CorpusStore.from_dataframe(load_database())
+
+
+def load_corpus() -> CorpusStore:
+    """Shared corpus store (row ids match the search engine's)"""
+    try:
+        return _load_corpus(get_database_stamp())
+    except FileNotFoundError as e:
+        st.error(f"❌ {e}")
         st.stop()
 
 
+def load_search_engine() -> EnhancedSearch:
+    """Shared search engine, rebuilt when the database or embeddings change"""
+    database_stamp = get_database_stamp()
+    
+    # Usually already built by the warm-up: no need to read the database
+    engine = get_loaded_search_engine()
+    if engine is not None and engine.corpus_version == database_stamp and not engine.is_stale():
+        return engine
+    
+    return get_search_engine(load_database(), corpus_version=database_stamp)
+
+
 @st.cache_data(ttl=3600, show_spinner=False)
 def get_logo_base64():
     """Get logo as base64 string with caching"""
@@ -498,7 +541,7 @@ def get_samhita_badge(file_name: str) -> str:
     return '<span class="badge-astanga">Aṣṭāṅga</span>'
 
 
-def get_reference_code(row: pd.Series) -> str:
+def get_reference_code(row: Dict) -> str:
     abbrev_map = {"Charaka Samhita": "Ch", "Sushruta Samhita": "Su", "Astanga Hrudaya": "A.Hr"}
     sthana_map = {
         "Sutrasthana": "Sū", "Nidanasthana": "Ni", "Vimanasthana": "Vi",
@@ -510,7 +553,7 @@ def get_reference_code(row: pd.Series) -> str:
     return f"{samhita}.{sthana}.{row['Chapter_Number']}/{row['Sloka_Number_Int']}"
 
 
-def get_devanagari_reference(row: pd.Series) -> str:
+def get_devanagari_reference(row: Dict) -> str:
     dev_nums = {'0': '०', '1': '१', '2': '२', '3': '३', '4': '४', 
                 '5': '५', '6': '६', '7': '७', '8': '८', '9': '९'}
     samhita_dev = {"Charaka Samhita": "च.सं", "Sushruta Samhita": "सु.सं", "Astanga Hrudaya": "अ.हृ"}
@@ -712,15 +755,29 @@ def render_header():
         """, unsafe_allow_html=True)
 
 
-def render_stats(df: pd.DataFrame):
-    total = len(df)
-    samhitas = df['File Name'].nunique()
+def get_readiness_badge(warmup: WarmupState = None) -> str:
+    """Badge text for the warm-up state"""
+    if warmup is None:
+        return "✅ Ready"
+    if warmup.error:
+        return "⚠️ Keyword search only"
+    if not warmup.ready:
+        phase = (warmup.current_phase or "").replace("_", " ")
+        return f"⏳ Warming up ({phase})"
+    if not warmup.semantic_available:
+        return "✅ Ready (keyword search)"
+    return "✅ Ready"
+
+
+def render_stats(corpus: CorpusStore, warmup: WarmupState = None):
+    total = len(corpus)
+    samhitas = len(corpus.categories('File Name'))
     
     st.markdown(f"""
     <div class="stats-container">
         <span class="stat-badge">📚 {total:,} ślokas</span>
         <span class="stat-badge">📖 {samhitas} Saṃhitās</span>
-        <span class="stat-badge">✅ Ready</span>
+        <span class="stat-badge">{get_readiness_badge(warmup)}</span>
     </div>
     """, unsafe_allow_html=True)
 
@@ -833,8 +890,8 @@ def render_disambiguation(query: str) -> str:
 # UI COMPONENTS - RESULTS
 # =============================================================================
 
-def render_sloka_card(row: pd.Series, idx: int):
-    """Render a single sloka as a styled card"""
+def render_sloka_card(row: Dict, idx: int):
+    """Render a single sloka (corpus record) as a styled card"""
     samhita_class = get_samhita_class(row['File Name'])
     badge = get_samhita_badge(row['File Name'])
     ref_eng = get_reference_code(row)
@@ -854,8 +911,8 @@ def render_sloka_card(row: pd.Series, idx: int):
     """, unsafe_allow_html=True)
 
 
-def render_results(results: pd.DataFrame, expanded_terms: List[str], query: str, max_results: int = 15):
-    """Render search results with Load More option"""
+def render_results(results: List[Dict], expanded_terms: List[str], query: str, max_results: int = 15):
+    """Render search results (corpus records) with Load More option"""
     
     total_found = len(results)
     
@@ -866,9 +923,12 @@ def render_results(results: pd.DataFrame, expanded_terms: List[str], query: str,
     </div>
     """, unsafe_allow_html=True)
     
-    # Group by Samhita for better organization
-    for samhita in results['File Name'].unique():
-        samhita_results = results[results['File Name'] == samhita]
+    # Group by Samhita for better organization (first-appearance order)
+    groups = {}
+    for row in results:
+        groups.setdefault(row['File Name'], []).append(row)
+    
+    for samhita, samhita_results in groups.items():
         
         # Create display name without HTML
         if "Charaka" in samhita:
@@ -879,7 +939,7 @@ def render_results(results: pd.DataFrame, expanded_terms: List[str], query: str,
             display_name = f"🟠 Aṣṭāṅga Hṛdaya ({len(samhita_results)} ślokas)"
         
         with st.expander(display_name, expanded=True):
-            for idx, (_, row) in enumerate(samhita_results.iterrows()):
+            for idx, row in enumerate(samhita_results):
                 render_sloka_card(row, idx)
     
     # Show tip if results might be limited
@@ -910,7 +970,7 @@ def render_chat_header():
     """, unsafe_allow_html=True)
 
 
-def render_chat_tab(df: pd.DataFrame, selected_samhitas: List[str], max_results: int):
+def render_chat_tab(corpus: CorpusStore, selected_samhitas: List[str], max_results: int):
     """Render the Chat with AI tab"""
     
     render_chat_header()
@@ -926,7 +986,7 @@ def render_chat_tab(df: pd.DataFrame, selected_samhitas: List[str], max_results:
         return
     
     # Check API key
-    api_configured = OPENAI_API_KEY and OPENAI_API_KEY != "sk-proj-YOUR_KEY_HERE"
+    api_configured = check_api_key_configured()
     
     if not api_configured:
         st.markdown("""
@@ -956,7 +1016,7 @@ def render_chat_tab(df: pd.DataFrame, selected_samhitas: List[str], max_results:
     </div>
     """, unsafe_allow_html=True)
     
-    # Initialize chat
+    # Initialize chat (once per session; the API client is shared by the process)
     if st.session_state.gemini_chat is None:
         with st.spinner(f"🔄 Initializing {CHATBOT_NAME}..."):
             try:
@@ -964,25 +1024,29 @@ def render_chat_tab(df: pd.DataFrame, selected_samhitas: List[str], max_results:
                 from config import OPENAI_API_KEY as API_KEY
                 
                 st.session_state.gemini_chat = OpenAIChat(api_key=API_KEY)
-                
-                if st.session_state.gemini_chat and st.session_state.gemini_chat.is_configured:
-                    slokas_context = format_slokas_for_chat(st.session_state.search_results)
-                    success = st.session_state.gemini_chat.start_chat(
-                        slokas_context, 
-                        st.session_state.chat_context_role,
-                        st.session_state.chat_context_query
-                    )
-                    if not success:
-                        st.error("❌ Failed to start chat session")
-                        st.session_state.gemini_chat = None
-                        return
-                else:
-                    st.error("❌ Could not configure AI. Check API key.")
-                    st.session_state.gemini_chat = None
-                    return
+                st.session_state.chat_needs_start = True
             except Exception as e:
                 st.error(f"❌ Error: {str(e)}")
                 return
+        
+        if not st.session_state.gemini_chat.is_configured:
+            st.error("❌ Could not configure AI. Check API key.")
+            st.session_state.gemini_chat = None
+            return
+    
+    # (Re)start the conversation with the current search's ślokas
+    if st.session_state.chat_needs_start:
+        # Records, not one formatted string: each question gets its most relevant ślokas
+        success = st.session_state.gemini_chat.start_chat(
+            st.session_state.search_results, 
+            st.session_state.chat_context_role,
+            st.session_state.chat_context_query
+        )
+        if not success:
+            st.error("❌ Failed to start chat session")
+            st.session_state.gemini_chat = None
+            return
+        st.session_state.chat_needs_start = False
     
     # Check chat ready
     if not st.session_state.gemini_chat or not st.session_state.gemini_chat.chat_session:
@@ -1008,7 +1072,16 @@ def render_chat_tab(df: pd.DataFrame, selected_samhitas: List[str], max_results:
             </div>
             """, unsafe_allow_html=True)
             st.markdown(msg["content"])
-    
+            timing = msg.get("timing") or {}
+            if timing.get("cached"):
+                st.caption("⚡ Answered from cache")
+            elif "ttft" in timing and "total" in timing:
+                st.caption(f"⚡ First words in {timing['ttft']:.1f}s · complete in {timing['total']:.1f}s")
+            context = msg.get("context") or {}
+            if context:
+                st.caption(f"📜 {context['slokas_sent']}/{context['slokas_total']} ślokas · "
+                           f"~{context['input_tokens']:,} input tokens")
+
     # Chat input
     st.markdown("---")
     
@@ -1057,14 +1130,31 @@ def render_chat_tab(df: pd.DataFrame, selected_samhitas: List[str], max_results:
             "content": user_input
         })
         
-        # Get AI response
-        with st.spinner(f"🤔 {CHATBOT_NAME} is thinking..."):
-            response = st.session_state.gemini_chat.send_message(user_input)
-        
-        # Add AI response
+        # Stream the AI response into a placeholder as it arrives
+        st.markdown(f"""
+        <div class="bot-msg">
+            <b>🙏 {CHATBOT_NAME}:</b>
+        </div>
+        """, unsafe_allow_html=True)
+        placeholder = st.empty()
+        placeholder.markdown(f"🤔 {CHATBOT_NAME} is thinking...")
+        
+        response = ""
+        last_render = 0.0
+        for delta in st.session_state.gemini_chat.stream_message(user_input):
+            response += delta
+            now = time.monotonic()
+            if now - last_render >= STREAM_RENDER_INTERVAL:
+                placeholder.markdown(response + " ▌")
+                last_render = now
+        placeholder.markdown(response)
+        
+        # Add AI response (with time to first token / total time)
         st.session_state.chat_messages.append({
             "role": "assistant",
-            "content": response
+            "content": response,
+            "timing": dict(st.session_state.gemini_chat.last_timing),
+            "context": dict(st.session_state.gemini_chat.last_context)
         })
         
         # Set flag to clear input on rerun
@@ -1077,7 +1167,7 @@ def render_chat_tab(df: pd.DataFrame, selected_samhitas: List[str], max_results:
     with col1:
         if st.button("🔄 Reset Chat", use_container_width=True):
             st.session_state.chat_messages = []
-            st.session_state.gemini_chat = None
+            st.session_state.chat_needs_start = True
             st.rerun()
 
 
@@ -1153,12 +1243,16 @@ def main():
     init_session_state()
     load_css()
     
-    # Load data
-    df = load_database()
-    
-    # Render header and stats
+    # Header first: nothing below delays the first paint
     render_header()
-    render_stats(df)
+    
+    # Warm up engine, embeddings and model once per process (background)
+    warmup = start_warmup(load_database, server_port=st.get_option("server.port"),
+                          corpus_version=get_database_stamp())
+    
+    # Compact corpus store (built once per process, DataFrame then released)
+    corpus = load_corpus()
+    render_stats(corpus, warmup)
     
     # Main tabs with bigger fonts
     tab_search, tab_chat = st.tabs(["🔍 Search Ślokas", f"💬 Chat with {CHATBOT_NAME}"])
@@ -1300,7 +1394,9 @@ def main():
             
             # Perform search
             with st.spinner("🔍 Searching across Bhruhat Trayi..."):
-                results, analysis, explanation = enhanced_search(df, query, max_results, selected_samhitas)
+                search_engine = load_search_engine()
+                results, analysis = search_engine.search(query, max_results, selected_samhitas)
+                explanation = search_engine.get_search_explanation(analysis)
             
             # Save to history
             if query not in st.session_state.search_history:
@@ -1311,12 +1407,15 @@ def main():
             if len(results) == 0:
                 st.markdown('<div class="warning-box">⚠️ No results found. Try different keywords.</div>', unsafe_allow_html=True)
             else:
+                # Result rows as compact corpus records (by row id, no DataFrame rows)
+                results = corpus.records(results['_row_id'])
+                
                 # Store for chat
                 st.session_state.search_results = results
                 st.session_state.chat_context_query = query
                 st.session_state.chat_context_role = selected_roles[0]
                 st.session_state.chat_messages = []
-                st.session_state.gemini_chat = None
+                st.session_state.chat_needs_start = True
                 
                 # Show analysis
                 with st.expander("🔬 Search Analysis", expanded=False):
@@ -1347,7 +1446,7 @@ def main():
     # TAB 2: CHAT
     # =========================================================================
     with tab_chat:
-        render_chat_tab(df, selected_samhitas if 'selected_samhitas' in dir() else None, max_results if 'max_results' in dir() else 10)
+        render_chat_tab(corpus, selected_samhitas if 'selected_samhitas' in dir() else None, max_results if 'max_results' in dir() else 10)
     
     # Footer
     st.markdown("---")
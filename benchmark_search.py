@@ -0,0 +1,285 @@
+"""
+Search Benchmark
+Bhruhat Trayi AI Assistant by PraKul
+
+Measures retrieval quality and latency of every search mode against a
+set of gold queries with expected references:
+- exact:     semantic search, full scan of the float32 matrix
+- ann:       semantic search through the IVF index
+- quantized: semantic search over the float16/int8 copy (exact scan)
+- keyword:   inverted-index search
+- hybrid:    semantic + keyword fused with RRF
+
+Gold references use the codes shown in the app, with either digit style:
+    "च.सं.सू.1/41"  or  "Ch.Sū.1/41"   - one śloka
+    "च.सं.चि.6"     or  "Ch.Chi.6"     - any śloka of that chapter
+
+Usage:
+    python benchmark_search.py
+    python benchmark_search.py --modes exact ann --k 5 10 --repeat 5
+    python benchmark_search.py --queries my_queries.json --output report.json
+"""
+
+import argparse
+import json
+import sys
+import time
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from enhanced_search import ANN_MIN_VECTORS, EnhancedSearch
+from setup_embeddings import load_database
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+APP_DIR = Path(__file__).parent
+
+QUERIES_PATH = APP_DIR / "benchmark_queries.json"
+REPORT_PATH = APP_DIR / "benchmark_report.json"
+
+BENCHMARK_MODES = ["exact", "ann", "quantized", "keyword", "hybrid"]
+DEFAULT_K = [1, 5, 10]
+DEFAULT_REPEAT = 3
+QUANTIZED_PRECISION = "int8"
+
+# Reference codes (same abbreviations as the app and the chat references)
+SAMHITA_CODES = {
+    "Charaka Samhita": ("च.सं", "Ch"),
+    "Sushruta Samhita": ("सु.सं", "Su"),
+    "Astanga Hrudaya": ("अ.हृ", "A.Hr"),
+}
+STHANA_CODES = {
+    "Sutrasthana": ("सू", "Sū"), "Nidanasthana": ("नि", "Ni"), "Vimanasthana": ("वि", "Vi"),
+    "Sharirasthana": ("शा", "Śā"), "Indriyasthana": ("इं", "In"), "Chikitsasthana": ("चि", "Chi"),
+    "Kalpasthana": ("क", "Ka"), "Siddhisthana": ("सि", "Si"), "Uttaratantra": ("उ", "Ut"),
+}
+DEVANAGARI_DIGITS = str.maketrans("०१२३४५६७८९", "0123456789")
+
+
+# =============================================================================
+# REFERENCE MATCHING
+# =============================================================================
+
+def normalize_reference(reference: str) -> str:
+    """ASCII digits, no spaces, lowercase"""
+    return reference.translate(DEVANAGARI_DIGITS).replace(" ", "").lower()
+
+
+def row_references(row: pd.Series) -> List[str]:
+    """Devanāgarī and Roman reference codes of a result row"""
+    file_name, sthana = str(row['File Name']), str(row['Sthana'])
+    samhita = SAMHITA_CODES.get(file_name, (file_name[:4], file_name[:2]))
+    sthana_code = STHANA_CODES.get(sthana, (sthana[:2], sthana[:2]))
+    location = f"{row['Chapter_Number']}/{row['Sloka_Number_Int']}"
+    return [normalize_reference(f"{samhita[i]}.{sthana_code[i]}.{location}") for i in (0, 1)]
+
+
+def matched_references(row: pd.Series, relevant: List[str]) -> Set[str]:
+    """Gold references matched by one result (chapter references match any of its ślokas)"""
+    codes = row_references(row)
+    matched = set()
+    for reference in relevant:
+        if "/" in reference:
+            if reference in codes:
+                matched.add(reference)
+        elif any(code.startswith(reference + "/") for code in codes):
+            matched.add(reference)
+    return matched
+
+
+def score_results(results: pd.DataFrame, relevant: List[str], k_values: List[int]) -> Dict:
+    """Recall@k and reciprocal rank of one ranked result list"""
+    found: Set[str] = set()
+    first_hit = None
+    recall = {}
+
+    for rank, (_, row) in enumerate(results.head(max(k_values)).iterrows(), start=1):
+        matched = matched_references(row, relevant)
+        if matched and first_hit is None:
+            first_hit = rank
+        found |= matched
+        if rank in k_values:
+            recall[rank] = len(found) / len(relevant)
+
+    # Fewer results than k: recall stays at its final value
+    for k in k_values:
+        recall.setdefault(k, len(found) / len(relevant))
+
+    return {
+        "recall": recall,
+        "reciprocal_rank": 1.0 / first_hit if first_hit else 0.0,
+        "first_hit": first_hit,
+    }
+
+
+# =============================================================================
+# BENCHMARK
+# =============================================================================
+
+def load_queries(path: Path) -> List[Dict]:
+    """Gold queries: [{"query": ..., "relevant": [...], "samhitas": [...] (optional)}]"""
+    with open(path, encoding="utf-8") as f:
+        queries = json.load(f)
+
+    for item in queries:
+        item["relevant"] = [normalize_reference(r) for r in item["relevant"]]
+    return [item for item in queries if item["relevant"]]
+
+
+def prepare_mode(mode: str, engine: EnhancedSearch,
+                 quantized_engine: Optional[EnhancedSearch]) -> Optional[str]:
+    """Configure the engine for a benchmark mode; returns a skip reason or None"""
+    # Production setting unless the mode pins exact or ANN search
+    engine.ann_min_vectors = ANN_MIN_VECTORS
+    if mode == "keyword":
+        return None
+    if mode == "quantized":
+        if quantized_engine is None or not quantized_engine.semantic_available:
+            return f"no {QUANTIZED_PRECISION} embeddings (run setup_embeddings.py --quantize {QUANTIZED_PRECISION})"
+        quantized_engine.ann_min_vectors = sys.maxsize
+        return None
+    if not engine.semantic_available:
+        return "semantic search unavailable (embeddings or sentence-transformers missing)"
+    if mode == "exact":
+        engine.ann_min_vectors = sys.maxsize
+    elif mode == "ann":
+        if engine.ann_index is None:
+            return "no ANN index (run setup_embeddings.py)"
+        engine.ann_min_vectors = 0
+    return None
+
+
+def run_mode(engine: EnhancedSearch, search_mode: str, queries: List[Dict],
+             k_values: List[int], repeat: int, cached_embeddings: bool) -> Dict:
+    """Quality and latency of one mode over all gold queries"""
+    max_k = max(k_values)
+    latencies = []
+    per_query = []
+
+    for item in queries:
+        results = None
+        for _ in range(repeat):
+            if not cached_embeddings:
+                engine.embedding_cache.clear()
+            start = time.perf_counter()
+            results, _ = engine.search(item["query"], max_k, item.get("samhitas"),
+                                       mode=search_mode, use_cache=False)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        scores = score_results(results, item["relevant"], k_values)
+        per_query.append({"query": item["query"], **scores})
+
+    return {
+        "queries": len(per_query),
+        "recall": {
+            str(k): float(np.mean([q["recall"][k] for q in per_query])) for k in k_values
+        },
+        "mrr": float(np.mean([q["reciprocal_rank"] for q in per_query])),
+        "latency_ms": {
+            "p50": float(np.percentile(latencies, 50)),
+            "p95": float(np.percentile(latencies, 95)),
+            "mean": float(np.mean(latencies)),
+        },
+        "per_query": [
+            {**q, "recall": {str(k): v for k, v in q["recall"].items()}} for q in per_query
+        ],
+    }
+
+
+def run_benchmark(df: pd.DataFrame, queries: List[Dict], modes: List[str] = BENCHMARK_MODES,
+                  k_values: List[int] = DEFAULT_K, repeat: int = DEFAULT_REPEAT,
+                  cached_embeddings: bool = False) -> Dict:
+    """Benchmark every requested mode; unavailable modes are reported as skipped"""
+    engine = EnhancedSearch(df, background_load=False)
+    quantized_engine = None
+    if "quantized" in modes:
+        quantized_engine = EnhancedSearch(df, embedding_precision=QUANTIZED_PRECISION, background_load=False)
+    k_values = sorted(set(k_values))
+
+    report = {
+        "corpus_size": len(df),
+        "queries": len(queries),
+        "k": k_values,
+        "repeat": repeat,
+        "cached_embeddings": cached_embeddings,
+        "ann_nprobe": engine.ann_nprobe,
+        "keyword_ranking": engine.keyword_ranking,
+        "modes": {},
+    }
+
+    for mode in modes:
+        skip_reason = prepare_mode(mode, engine, quantized_engine)
+        if skip_reason:
+            print(f"⏭️  {mode}: skipped - {skip_reason}")
+            report["modes"][mode] = {"skipped": skip_reason}
+            continue
+
+        print(f"⏱️  {mode}: {len(queries)} queries x {repeat}...")
+        target = quantized_engine if mode == "quantized" else engine
+        search_mode = {"keyword": "keyword", "hybrid": "hybrid"}.get(mode, "semantic")
+        report["modes"][mode] = run_mode(target, search_mode, queries, k_values, repeat, cached_embeddings)
+
+    return report
+
+
+def print_report(report: Dict):
+    """Summary table of a benchmark report"""
+    k_values = report["k"]
+    header = f"{'mode':<10}" + "".join(f"{'R@' + str(k):>8}" for k in k_values) + f"{'MRR':>8}{'p50 ms':>10}{'p95 ms':>10}"
+
+    print()
+    print(header)
+    print("-" * len(header))
+    for mode, result in report["modes"].items():
+        if "skipped" in result:
+            print(f"{mode:<10}  skipped")
+            continue
+        recalls = "".join(f"{result['recall'][str(k)]:>8.3f}" for k in k_values)
+        latency = result["latency_ms"]
+        print(f"{mode:<10}{recalls}{result['mrr']:>8.3f}{latency['p50']:>10.1f}{latency['p95']:>10.1f}")
+
+
+def parse_args(argv=None):
+    """Command-line options"""
+    parser = argparse.ArgumentParser(description="Benchmark search quality and latency per retrieval mode")
+    parser.add_argument("--queries", type=Path, default=QUERIES_PATH,
+                        help=f"gold queries JSON (default: {QUERIES_PATH.name})")
+    parser.add_argument("--output", type=Path, default=REPORT_PATH,
+                        help=f"report JSON (default: {REPORT_PATH.name})")
+    parser.add_argument("--modes", nargs="+", choices=BENCHMARK_MODES, default=BENCHMARK_MODES,
+                        help="modes to benchmark (default: all)")
+    parser.add_argument("--k", nargs="+", type=int, default=DEFAULT_K,
+                        help="cut-offs for recall@k (default: 1 5 10)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help=f"timed runs per query (default: {DEFAULT_REPEAT})")
+    parser.add_argument("--cached-embeddings", action="store_true",
+                        help="keep query embeddings cached, timing retrieval only")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("=" * 70)
+    print("🪷 Bhruhat Trayi AI Assistant - Search Benchmark")
+    print("=" * 70)
+
+    df = load_database()
+    queries = load_queries(args.queries)
+    print(f"📋 {len(queries)} gold queries from {args.queries}")
+
+    report = run_benchmark(df, queries, args.modes, args.k, args.repeat, args.cached_embeddings)
+    print_report(report)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Report saved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Shared Chat Client
+Bhruhat Trayi AI Assistant by PraKul
+
+One process-wide OpenAI client for every Streamlit session:
+1. AsyncOpenAI runs on a single background event loop thread
+2. Its httpx connection pool keeps connections alive, so sessions reuse
+   them instead of paying a TLS handshake each
+3. A semaphore bounds concurrent API requests; further requests wait in
+   its FIFO queue (up to CHAT_MAX_QUEUED_REQUESTS, then fail fast)
+
+Callers stay synchronous: stream_chat() is a plain generator of text
+deltas fed from the event loop through a thread-safe queue.
+
+Set OPENAI_BASE_URL in config.py to use any OpenAI-compatible server
+(e.g. local_chat_server.py for testing).
+"""
+
+import asyncio
+import queue
+import threading
+from typing import Dict, Iterator, List, Optional
+
+# Import configuration
+try:
+    from config import (
+        OPENAI_BASE_URL, CHAT_MAX_CONCURRENT_REQUESTS, CHAT_MAX_QUEUED_REQUESTS,
+        CHAT_MAX_CONNECTIONS, CHAT_REQUEST_TIMEOUT
+    )
+except ImportError:
+    OPENAI_BASE_URL = None
+    CHAT_MAX_CONCURRENT_REQUESTS = 8
+    CHAT_MAX_QUEUED_REQUESTS = 64
+    CHAT_MAX_CONNECTIONS = 16
+    CHAT_REQUEST_TIMEOUT = 120
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+KEEPALIVE_EXPIRY = 60  # Seconds an idle pooled connection is kept open
+MAX_RETRIES = 2
+
+
+# =============================================================================
+# SHARED CHAT CLIENT CLASS
+# =============================================================================
+
+class ChatClientBusy(RuntimeError):
+    """Raised when the request queue is full"""
+
+
+class SharedChatClient:
+    """AsyncOpenAI on a background event loop with bounded concurrency"""
+
+    def __init__(self, api_key: str, base_url: Optional[str] = OPENAI_BASE_URL,
+                 max_concurrent: int = CHAT_MAX_CONCURRENT_REQUESTS,
+                 max_queued: int = CHAT_MAX_QUEUED_REQUESTS,
+                 max_connections: int = CHAT_MAX_CONNECTIONS,
+                 timeout: float = CHAT_REQUEST_TIMEOUT):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+
+        # Counters (only touched on the event loop thread)
+        self.active = 0
+        self.waiting = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name="chat-client", daemon=True).start()
+
+        # Client and semaphore must be created on the loop that uses them
+        asyncio.run_coroutine_threadsafe(self._setup(max_connections, timeout), self._loop).result()
+
+    async def _setup(self, max_connections: int, timeout: float):
+        import httpx
+        from openai import AsyncOpenAI
+
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections,
+                                keepalive_expiry=KEEPALIVE_EXPIRY),
+            timeout=httpx.Timeout(timeout, connect=10.0),
+        )
+        self._client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url,
+                                   http_client=http_client, max_retries=MAX_RETRIES)
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+
+    def stream_chat(self, messages: List[Dict], **params) -> Iterator[str]:
+        """
+        Stream a chat completion as text deltas (blocking generator)
+
+        params are passed to chat.completions.create (model, max_tokens, ...).
+        Closing the generator early cancels the request.
+        """
+        deltas: "queue.Queue" = queue.Queue()
+        future = asyncio.run_coroutine_threadsafe(self._stream(messages, params, deltas), self._loop)
+        try:
+            while True:
+                kind, value = deltas.get()
+                if kind == "delta":
+                    yield value
+                elif kind == "error":
+                    raise value
+                else:
+                    return
+        finally:
+            if not future.done():
+                future.cancel()
+
+    def complete(self, messages: List[Dict], **params) -> str:
+        """Full (non-streamed) answer text"""
+        return "".join(self.stream_chat(messages, **params))
+
+    async def _stream(self, messages: List[Dict], params: Dict, deltas: "queue.Queue"):
+        if self.waiting >= self.max_queued:
+            self.rejected += 1
+            deltas.put(("error", ChatClientBusy("Too many chat requests right now. Please try again in a moment.")))
+            return
+
+        self.waiting += 1
+        queued = True
+        try:
+            async with self._semaphore:
+                self.waiting -= 1
+                queued = False
+                self.active += 1
+                try:
+                    stream = await self._client.chat.completions.create(
+                        messages=messages, stream=True, **params
+                    )
+                    try:
+                        async for chunk in stream:
+                            if chunk.choices and chunk.choices[0].delta.content:
+                                deltas.put(("delta", chunk.choices[0].delta.content))
+                    finally:
+                        await stream.close()
+                finally:
+                    self.active -= 1
+            self.completed += 1
+            deltas.put(("done", None))
+        except Exception as e:
+            self.failed += 1
+            deltas.put(("error", e))
+        finally:
+            if queued:
+                self.waiting -= 1
+
+    def stats(self) -> Dict[str, int]:
+        """Concurrency and request counters"""
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_concurrent": self.max_concurrent,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
+
+
+# =============================================================================
+# PROCESS-WIDE CLIENT
+# =============================================================================
+
+_CLIENT: Optional[SharedChatClient] = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def get_chat_client(api_key: str, base_url: Optional[str] = OPENAI_BASE_URL) -> SharedChatClient:
+    """The shared client (recreated only if the API key or base URL change)"""
+    global _CLIENT
+
+    with _CLIENT_LOCK:
+        if _CLIENT is None or (_CLIENT.api_key, _CLIENT.base_url) != (api_key, base_url):
+            _CLIENT = SharedChatClient(api_key, base_url)
+        return _CLIENT
@@ -0,0 +1,239 @@
+"""
+Chat Context Module
+Bhruhat Trayi AI Assistant by PraKul
+
+Builds the messages of each chat request within an input token budget:
+1. Tokens are counted locally (tiktoken if installed, else a conservative
+   UTF-8 byte estimate)
+2. Recent turns are kept verbatim; older ones are folded into a short
+   summary of the earlier questions
+3. The session's ślokas are ranked against the question (explicit śloka
+   numbers / references first, then word overlap and, when the search
+   engine's embeddings are loaded, semantic similarity) and added
+   best-first until the budget is used up
+
+Śloka numbers stay those of the original search, so references in
+earlier answers remain valid.
+"""
+
+import math
+import re
+import unicodedata
+from importlib.util import find_spec
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+TOKENIZER_ENCODING = "o200k_base"  # gpt-4o family
+BYTES_PER_TOKEN = 4                # Fallback estimate (over-counts Devanāgarī: safe)
+MESSAGE_OVERHEAD_TOKENS = 4        # Role/formatting tokens per message
+
+HISTORY_BUDGET_SHARE = 0.35        # Share of the free budget for past turns
+MIN_CONTEXT_SLOKAS = 1             # Always sent, even over budget
+SUMMARY_ITEM_CHARS = 120           # Earlier questions are cut to this length
+MAX_SUMMARY_ITEMS = 10
+
+# Words ignored when matching a question against ślokas
+STOPWORDS = {
+    "the", "and", "are", "for", "from", "how", "what", "which", "with", "this",
+    "these", "that", "those", "about", "explain", "give", "tell", "does", "can",
+    "into", "there", "their", "please", "simple", "terms", "sloka", "slokas",
+    "śloka", "ślokas", "verse", "verses", "according", "mentioned", "said",
+}
+
+
+# =============================================================================
+# TOKEN COUNTING
+# =============================================================================
+
+_ENCODER = None
+_ENCODER_LOADED = False
+
+
+def _encoder():
+    """tiktoken encoder, loaded on first use (None if not installed)"""
+    global _ENCODER, _ENCODER_LOADED
+    if not _ENCODER_LOADED:
+        _ENCODER_LOADED = True
+        if find_spec("tiktoken") is not None:
+            try:
+                import tiktoken
+                _ENCODER = tiktoken.get_encoding(TOKENIZER_ENCODING)
+            except Exception as e:
+                print(f"⚠️ tiktoken unavailable, estimating tokens: {e}")
+    return _ENCODER
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens in a text"""
+    if not text:
+        return 0
+    encoder = _encoder()
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+    return math.ceil(len(text.encode("utf-8")) / BYTES_PER_TOKEN)
+
+
+def message_tokens(message: Dict) -> int:
+    return count_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+
+# =============================================================================
+# ŚLOKA RELEVANCE
+# =============================================================================
+
+def fold(text: str) -> str:
+    """Lowercase and strip diacritics (vātaḥ -> vatah); Devanāgarī is kept"""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c) or ord(c) >= 0x0900)
+
+
+def question_terms(question: str) -> List[str]:
+    """Content words of a question"""
+    words = re.findall(r"\w+", fold(question))
+    return [w for w in dict.fromkeys(words) if len(w) >= 3 and w not in STOPWORDS and not w.isdigit()]
+
+
+def sloka_search_text(row: Dict) -> str:
+    """Folded text of a śloka record used for word matching"""
+    fields = ('Sloka Text', 'IAST', 'Roman', 'Chapter', 'Sthana')
+    return fold(" ".join(str(row.get(f, '') or '') for f in fields))
+
+
+def lexical_scores(question: str, sloka_texts: Sequence[str]) -> np.ndarray:
+    """IDF-weighted count of question words found in each śloka"""
+    scores = np.zeros(len(sloka_texts))
+    n = len(sloka_texts)
+    for term in question_terms(question):
+        hits = np.array([term in text for text in sloka_texts], dtype=bool)
+        df = int(hits.sum())
+        if df:
+            scores[hits] += math.log(1 + n / df)
+    return scores
+
+
+def explicit_references(question: str, slokas: Sequence[Dict]) -> np.ndarray:
+    """Ślokas the question points at by number ("śloka 3") or reference ("1/41")"""
+    mentioned = np.zeros(len(slokas), dtype=bool)
+    folded = fold(question)
+
+    for number in re.findall(r"(?:sloka|verse|#)\s*(\d+)", folded):
+        index = int(number) - 1
+        if 0 <= index < len(slokas):
+            mentioned[index] = True
+
+    for chapter, verse in re.findall(r"(\d+)\s*/\s*(\d+)", question):
+        for i, row in enumerate(slokas):
+            if str(row.get('Chapter_Number')) == chapter and str(row.get('Sloka_Number_Int')) == verse:
+                mentioned[i] = True
+
+    return mentioned
+
+
+def rank_slokas(question: str, slokas: Sequence[Dict], sloka_texts: Sequence[str],
+                extra_scores: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Śloka indices, most relevant first
+
+    extra_scores: optional additional relevance in 0-1 (e.g. embedding
+    similarity); word overlap is then scaled to 0-1 as well.
+    Ties keep the search order, so general questions keep the top results.
+    """
+    scores = lexical_scores(question, sloka_texts)
+    if extra_scores is not None:
+        if scores.max() > 0:
+            scores = scores / scores.max()
+        scores = scores + extra_scores
+    scores[explicit_references(question, slokas)] += 1e6
+    return np.argsort(-scores, kind="stable")
+
+
+# =============================================================================
+# CONVERSATION SUMMARY
+# =============================================================================
+
+def summarize_turns(questions: Sequence[str]) -> str:
+    """Short summary of turns that no longer fit (their questions only)"""
+    if not questions:
+        return ""
+    items = []
+    for question in list(questions)[-MAX_SUMMARY_ITEMS:]:
+        question = " ".join(question.split())
+        if len(question) > SUMMARY_ITEM_CHARS:
+            question = question[:SUMMARY_ITEM_CHARS].rstrip() + "…"
+        items.append(f"- {question}")
+    omitted = len(questions) - len(items)
+    header = "Earlier in this conversation the user asked:"
+    if omitted > 0:
+        header += f" ({omitted} older questions omitted)"
+    return header + "\n" + "\n".join(items)
+
+
+# =============================================================================
+# REQUEST ASSEMBLY
+# =============================================================================
+
+def assemble_messages(build_system_prompt: Callable[[str], str],
+                      sloka_blocks: Sequence[str], sloka_tokens: Sequence[int],
+                      sloka_order: Sequence[int], history: List[Dict],
+                      earlier_questions: Sequence[str], budget: int) -> Tuple[List[Dict], Dict]:
+    """
+    Messages for one request, within budget input tokens
+
+    history: kept turns, ending with the current user message.
+    earlier_questions: questions of turns already dropped from history.
+    Returns (messages, stats).
+    """
+    current, previous = history[-1], history[:-1]
+    fixed = message_tokens(current) + count_tokens(build_system_prompt("")) + MESSAGE_OVERHEAD_TOKENS
+    free = max(budget - fixed, 0)
+
+    # 1. Most recent turns, newest first, within their share of the budget
+    history_budget = int(free * HISTORY_BUDGET_SHARE)
+    kept_count, history_used = 0, 0
+    for message in reversed(previous):
+        tokens = message_tokens(message)
+        if history_used + tokens > history_budget:
+            break
+        kept_count += 1
+        history_used += tokens
+    kept = previous[len(previous) - kept_count:]
+    if kept and kept[0]["role"] == "assistant":
+        # Never start with an answer whose question was dropped
+        history_used -= message_tokens(kept[0])
+        kept = kept[1:]
+
+    dropped = previous[:len(previous) - len(kept)]
+    summary = summarize_turns(list(earlier_questions) + [m["content"] for m in dropped if m["role"] == "user"])
+    summary_tokens = count_tokens(summary)
+
+    # 2. Ślokas, most relevant first, until the budget is used
+    sloka_budget = free - history_used - summary_tokens
+    chosen, sloka_used = [], 0
+    for index in sloka_order:
+        tokens = sloka_tokens[index]
+        if len(chosen) >= MIN_CONTEXT_SLOKAS and sloka_used + tokens > sloka_budget:
+            continue
+        chosen.append(index)
+        sloka_used += tokens
+
+    # Search order in the prompt (numbers stay those of the search)
+    slokas_context = "\n".join(sloka_blocks[i] for i in sorted(chosen))
+    system_prompt = build_system_prompt(slokas_context)
+    if summary:
+        system_prompt += f"\n\n---\n\n{summary}"
+
+    messages = [{"role": "system", "content": system_prompt}] + kept + [current]
+    stats = {
+        "input_tokens": sum(message_tokens(m) for m in messages),
+        "slokas_sent": len(chosen),
+        "slokas_total": len(sloka_blocks),
+        "turns_kept": len(kept),
+        "turns_summarized": len(dropped) + len(earlier_questions),
+    }
+    return messages, stats
@@ -8,21 +8,22 @@ Features:
 - Anvaya translations on request only
 - ALWAYS includes Samhita references
 - Strict factual responses - no hallucination
-- Conversation history
+- Conversation history within a token budget (see chat_context.py)
+- Persistent cache of identical requests (see response_cache.py)
 """
 
-from typing import List, Dict, Optional
-import pandas as pd
+import time
+from typing import List, Dict, Iterator, Optional
+from importlib.util import find_spec
+import numpy as np
 
-# Try to import OpenAI
-OPENAI_AVAILABLE = False
-openai_client = None
+from corpus_store import as_records
+from chat_context import count_tokens, sloka_search_text, rank_slokas, assemble_messages
+from response_cache import get_response_cache, response_key, is_cacheable
 
-try:
-    from openai import OpenAI
-    OPENAI_AVAILABLE = True
-except ImportError:
-    pass
+# OpenAI is imported only when a client is configured (keeps app start fast)
+OPENAI_AVAILABLE = find_spec("openai") is not None
+openai_client = None
 
 # Import configuration
 try:
@@ -34,6 +35,23 @@ except ImportError:
     TEMPERATURE = 0.1
     CHATBOT_NAME = "AI TrayiDoota"
 
+try:
+    from config import OPENAI_BASE_URL
+except ImportError:
+    OPENAI_BASE_URL = None
+
+try:
+    from config import MAX_INPUT_TOKENS, MAX_CHAT_HISTORY
+except ImportError:
+    MAX_INPUT_TOKENS = 8000
+    MAX_CHAT_HISTORY = 20
+
+try:
+    from config import CHAT_RERANK_SLOKAS, CHAT_RERANK_TOP_K
+except ImportError:
+    CHAT_RERANK_SLOKAS = True
+    CHAT_RERANK_TOP_K = 5
+
 
 # =============================================================================
 # SYSTEM PROMPTS FOR DIFFERENT ROLES - STRICT FACTUAL ONLY
@@ -136,19 +154,33 @@ IMPORTANT: Never generate information without a direct reference to the provided
 class OpenAIChat:
     """Handles chat interactions with OpenAI API"""
     
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, rerank_slokas: bool = None):
         self.api_key = api_key or OPENAI_API_KEY
+        self.rerank_slokas = CHAT_RERANK_SLOKAS if rerank_slokas is None else rerank_slokas
         self.client = None
         self.is_configured = False
         self.conversation_history = []
         self.system_prompt = ""
         self.chat_session = None  # For compatibility
+        self.last_timing: Dict[str, float] = {}  # ttft / total seconds of the last reply
+        self.last_context: Dict[str, int] = {}   # Tokens / ślokas / turns of the last request
+        self.role_prompt = ""
+        self.query = ""
+        self.slokas: List[Dict] = []
+        self.sloka_blocks: List[str] = []
+        self.sloka_tokens: List[int] = []
+        self.sloka_texts: List[str] = []
+        self.earlier_questions: List[str] = []  # Questions of turns trimmed from the history
         
         if not OPENAI_AVAILABLE:
             print("⚠️ OpenAI package not installed. Run: pip install openai")
             return
         
-        if self.api_key and self.api_key != "sk-proj-YOUR_KEY_HERE":
+        if OPENAI_BASE_URL:
+            # OpenAI-compatible stand-in server: any key will do
+            self.api_key = self.api_key or "local"
+            self._configure()
+        elif self.api_key and self.api_key != "sk-proj-YOUR_KEY_HERE":
             self._configure()
     
     def _configure(self):
@@ -157,15 +189,23 @@ class OpenAIChat:
             return
             
         try:
-            self.client = OpenAI(api_key=self.api_key)
+            from chat_client import get_chat_client
+            
+            # Process-wide client: pooled connections shared by all sessions
+            self.client = get_chat_client(self.api_key, OPENAI_BASE_URL)
             self.is_configured = True
             print(f"✅ {CHATBOT_NAME} configured successfully")
         except Exception as e:
             print(f"❌ Error configuring {CHATBOT_NAME}: {e}")
             self.is_configured = False
     
-    def start_chat(self, slokas_context: str, role: str, query: str):
-        """Start a new chat session with context"""
+    def start_chat(self, slokas_context, role: str, query: str):
+        """
+        Start a new chat session with context
+        
+        slokas_context: search results (records or DataFrame), or an already
+        formatted context string (then always sent whole).
+        """
         if not self.is_configured:
             print(f"⚠️ {CHATBOT_NAME} not configured")
             return False
@@ -174,16 +214,41 @@ class OpenAIChat:
             print("⚠️ OpenAI client not initialized")
             return False
         
-        role_prompt = ROLE_SYSTEM_PROMPTS.get(role, ROLE_SYSTEM_PROMPTS["Student"])
+        self.role_prompt = ROLE_SYSTEM_PROMPTS.get(role, ROLE_SYSTEM_PROMPTS["Student"])
+        self.query = query
         
-        # Build the system prompt with context - STRICT FACTUAL ONLY
-        self.system_prompt = f"""{role_prompt}
+        # One context block per śloka, so each request can send only the relevant ones
+        records = [] if isinstance(slokas_context, str) else as_records(slokas_context)
+        if not records:
+            self.slokas = [{}]
+            self.sloka_blocks = [slokas_context if isinstance(slokas_context, str) else "No ślokas available."]
+        else:
+            self.slokas = records
+            self.sloka_blocks = [format_sloka_for_chat(idx + 1, row) for idx, row in enumerate(self.slokas)]
+        self.sloka_tokens = [count_tokens(block) for block in self.sloka_blocks]
+        self.sloka_texts = [sloka_search_text(row) for row in self.slokas]
+        
+        # Full prompt (all ślokas); requests are assembled per message
+        self.system_prompt = self._system_prompt("\n".join(self.sloka_blocks))
+        
+        # Reset conversation history
+        self.conversation_history = []
+        self.earlier_questions = []
+        self.chat_session = True  # Mark as active
+        
+        print(f"✅ {CHATBOT_NAME} session started successfully")
+        return True
+    
+    def _system_prompt(self, slokas_context: str) -> str:
+        """System prompt for the session's role and query with the given ślokas"""
+        # STRICT FACTUAL ONLY
+        return f"""{self.role_prompt}
 
 ---
 
 ## CONTEXT: Ślokas from User's Search
 
-The user searched for: **"{query}"**
+The user searched for: **"{self.query}"**
 
 HERE ARE THE ONLY ŚLOKAS YOU CAN USE (do not use any other information):
 
@@ -200,18 +265,52 @@ STRICT INSTRUCTIONS - FOLLOW EXACTLY:
 6. Do NOT provide Anvaya unless user explicitly asks for it
 
 REMEMBER: You are a reference assistant, not a general knowledge AI. Only cite what is in the ślokas above."""
+    
+    def _semantic_scores(self, message: str) -> Optional[np.ndarray]:
+        """
+        Similarity of the message to each session śloka, from the search
+        engine's already loaded embeddings (None if they are not loaded)
+        """
+        row_ids = [row.get('_row_id') for row in self.slokas]
+        if not row_ids or None in row_ids:
+            return None
         
-        # Reset conversation history
-        self.conversation_history = []
-        self.chat_session = True  # Mark as active
-        
-        print(f"✅ {CHATBOT_NAME} session started successfully")
-        return True
+        try:
+            from enhanced_search import get_loaded_search_engine
+            
+            engine = get_loaded_search_engine()
+            if engine is None:
+                return None
+            return engine.similarity(message, row_ids)
+        except Exception as e:
+            print(f"⚠️ Śloka re-ranking skipped: {e}")
+            return None
+    
+    def _trim_history(self):
+        """Keep at most MAX_CHAT_HISTORY messages; dropped questions go to the summary"""
+        history = self.conversation_history
+        while len(history) > MAX_CHAT_HISTORY or (history and history[0]["role"] == "assistant"):
+            dropped = history.pop(0)
+            if dropped["role"] == "user":
+                self.earlier_questions.append(dropped["content"])
     
     def send_message(self, message: str) -> str:
         """Send a message and get response"""
+        return "".join(self.stream_message(message))
+    
+    def stream_message(self, message: str) -> Iterator[str]:
+        """
+        Send a message and yield the response text as it arrives
+        
+        The full answer is added to the history once the stream ends;
+        time to first token and total time are kept in last_timing.
+        """
         if not self.is_configured or not self.client:
-            return f"❌ {CHATBOT_NAME} not initialized. Please search for ślokas first."
+            yield f"❌ {CHATBOT_NAME} not initialized. Please search for ślokas first."
+            return
+        
+        start = time.perf_counter()
+        self.last_timing = {}
         
         try:
             # Add user message to history
@@ -220,41 +319,64 @@ REMEMBER: You are a reference assistant, not a general knowledge AI. Only cite w
                 "content": message
             })
             
-            # Build messages array
-            messages = [{"role": "system", "content": self.system_prompt}]
-            messages.extend(self.conversation_history)
+            self._trim_history()
             
-            # Call OpenAI API
-            response = self.client.chat.completions.create(
-                model=OPENAI_MODEL,
-                messages=messages,
-                max_tokens=MAX_OUTPUT_TOKENS,
-                temperature=TEMPERATURE
+            # Build messages within the input budget: recent turns + most relevant ślokas
+            # Follow-ups only: the first question (often a quick prompt about
+            # "these ślokas") gets the budgeted full set
+            follow_up = len(self.conversation_history) > 1 or bool(self.earlier_questions)
+            similarity = self._semantic_scores(message) if self.rerank_slokas and follow_up else None
+            order = rank_slokas(message, self.slokas, self.sloka_texts, similarity)
+            if similarity is not None:
+                order = order[:CHAT_RERANK_TOP_K]
+            messages, self.last_context = assemble_messages(
+                self._system_prompt, self.sloka_blocks, self.sloka_tokens, order,
+                self.conversation_history, self.earlier_questions, MAX_INPUT_TOKENS
             )
+            self.last_context["reranked"] = similarity is not None
+            
+            params = {"model": OPENAI_MODEL, "max_tokens": MAX_OUTPUT_TOKENS, "temperature": TEMPERATURE}
+            
+            # Same request answered before (e.g. a quick prompt on the same search)
+            cache = get_response_cache() if is_cacheable(TEMPERATURE) else None
+            cache_key = response_key(messages, **params) if cache else None
+            cached = cache.get(cache_key) if cache else None
+            if cached is not None:
+                elapsed = time.perf_counter() - start
+                self.last_timing = {"ttft": elapsed, "total": elapsed, "cached": True}
+                yield cached
+                self.conversation_history.append({"role": "assistant", "content": cached})
+                return
             
-            # Extract response text
-            assistant_message = response.choices[0].message.content
+            # Call OpenAI API (streamed, through the shared client)
+            stream = self.client.stream_chat(messages, **params)
+            
+            parts = []
+            for delta in stream:
+                if not parts:
+                    self.last_timing["ttft"] = time.perf_counter() - start
+                parts.append(delta)
+                yield delta
+            
+            self.last_timing["total"] = time.perf_counter() - start
+            answer = "".join(parts)
             
             # Add assistant response to history
             self.conversation_history.append({
                 "role": "assistant",
-                "content": assistant_message
+                "content": answer
             })
             
-            return assistant_message
+            if cache and answer:
+                cache.set(cache_key, answer, OPENAI_MODEL)
             
         except Exception as e:
-            error_msg = str(e)
-            if "insufficient_quota" in error_msg:
-                return "❌ OpenAI quota exceeded. Please check your billing at platform.openai.com"
-            elif "invalid_api_key" in error_msg:
-                return "❌ Invalid API key. Please check your OpenAI API key in config.py"
-            else:
-                return f"❌ Error: {error_msg}"
+            yield _error_message(e)
     
     def reset_chat(self):
         """Reset the chat session"""
         self.conversation_history = []
+        self.earlier_questions = []
         self.system_prompt = ""
         self.chat_session = None
 
@@ -263,64 +385,78 @@ REMEMBER: You are a reference assistant, not a general knowledge AI. Only cite w
 # HELPER FUNCTIONS
 # =============================================================================
 
-def format_slokas_for_chat(results_df: pd.DataFrame) -> str:
-    """Format search results as context for chat"""
-    if len(results_df) == 0:
-        return "No ślokas available."
+def _error_message(error: Exception) -> str:
+    """User-facing text for an API error"""
+    error_msg = str(error)
+    if "insufficient_quota" in error_msg:
+        return "❌ OpenAI quota exceeded. Please check your billing at platform.openai.com"
+    elif "invalid_api_key" in error_msg:
+        return "❌ Invalid API key. Please check your OpenAI API key in config.py"
+    else:
+        return f"❌ Error: {error_msg}"
+
+
+def format_sloka_for_chat(number: int, row: Dict) -> str:
+    """Format one śloka record as a numbered context block"""
+    # Create reference
+    file_name = str(row.get('File Name', ''))
+    sthana = str(row.get('Sthana', ''))
+    chapter = str(row.get('Chapter_Number', ''))
+    sloka_num = str(row.get('Sloka_Number_Int', ''))
     
-    formatted = []
+    # Abbreviate
+    abbrev_map = {
+        "Charaka Samhita": "च.सं",
+        "Sushruta Samhita": "सु.सं",
+        "Astanga Hrudaya": "अ.हृ"
+    }
+    sthana_map = {
+        "Sutrasthana": "सू",
+        "Nidanasthana": "नि",
+        "Chikitsasthana": "चि",
+        "Sharirasthana": "शा",
+        "Kalpasthana": "क",
+        "Siddhisthana": "सि",
+        "Vimanasthana": "वि",
+        "Indriyasthana": "इं",
+        "Uttaratantra": "उ"
+    }
     
-    for idx, row in results_df.iterrows():
-        # Create reference
-        file_name = str(row.get('File Name', ''))
-        sthana = str(row.get('Sthana', ''))
-        chapter = str(row.get('Chapter_Number', ''))
-        sloka_num = str(row.get('Sloka_Number_Int', ''))
-        
-        # Abbreviate
-        abbrev_map = {
-            "Charaka Samhita": "च.सं",
-            "Sushruta Samhita": "सु.सं",
-            "Astanga Hrudaya": "अ.हृ"
-        }
-        sthana_map = {
-            "Sutrasthana": "सू",
-            "Nidanasthana": "नि",
-            "Chikitsasthana": "चि",
-            "Sharirasthana": "शा",
-            "Kalpasthana": "क",
-            "Siddhisthana": "सि",
-            "Vimanasthana": "वि",
-            "Indriyasthana": "इं",
-            "Uttaratantra": "उ"
-        }
-        
-        samhita_abbr = abbrev_map.get(file_name, file_name[:4])
-        sthana_abbr = sthana_map.get(sthana, sthana[:2])
-        
-        ref = f"{samhita_abbr}.{sthana_abbr}.{chapter}/{sloka_num}"
-        
-        # Get texts
-        sloka_text = str(row.get('Sloka Text', ''))
-        iast = str(row.get('IAST', ''))
-        
-        formatted.append(f"""
-### Śloka {idx + 1}: {ref}
+    samhita_abbr = abbrev_map.get(file_name, file_name[:4])
+    sthana_abbr = sthana_map.get(sthana, sthana[:2])
+    
+    ref = f"{samhita_abbr}.{sthana_abbr}.{chapter}/{sloka_num}"
+    
+    # Get texts
+    sloka_text = str(row.get('Sloka Text', ''))
+    iast = str(row.get('IAST', ''))
+    
+    return f"""
+### Śloka {number}: {ref}
 
 **Devanāgarī:**
 {sloka_text}
 
 **IAST:**
 {iast}
-""")
+"""
+
+
+def format_slokas_for_chat(slokas) -> str:
+    """Format search results (records or DataFrame) as context for chat"""
+    slokas = as_records(slokas)
+    if len(slokas) == 0:
+        return "No ślokas available."
     
-    return "\n".join(formatted)
+    return "\n".join(format_sloka_for_chat(idx + 1, row) for idx, row in enumerate(slokas))
 
 
 def check_api_key_configured() -> bool:
     """Check if API key is properly configured"""
     if not OPENAI_AVAILABLE:
         return False
+    if OPENAI_BASE_URL:
+        return True
     if not OPENAI_API_KEY:
         return False
     if OPENAI_API_KEY == "sk-proj-YOUR_KEY_HERE":
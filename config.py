@@ -25,20 +25,43 @@ except:
 # - "gpt-4o" = Best quality, 10x more expensive
 OPENAI_MODEL = "gpt-4o-mini"
 
+# OpenAI-compatible server (None = api.openai.com)
+# For local testing: "http://localhost:8000/v1" (python local_chat_server.py)
+OPENAI_BASE_URL = None
+
 # =============================================================================
 # CHAT SETTINGS
 # =============================================================================
 
-# Maximum conversation history to maintain
+# Maximum conversation history to maintain (messages; older ones are summarized)
 MAX_CHAT_HISTORY = 20
 
 # Maximum tokens in response
 MAX_OUTPUT_TOKENS = 2048
 
+# Input token budget per chat request (system prompt + ślokas + history)
+MAX_INPUT_TOKENS = 8000
+
+# Re-rank the search's ślokas against each follow-up question (embedding engine)
+# and send only the top few to the model
+CHAT_RERANK_SLOKAS = True
+CHAT_RERANK_TOP_K = 5
+
+# Persistent answer cache for identical requests (see response_cache.py)
+CHAT_RESPONSE_CACHE = True
+CHAT_RESPONSE_CACHE_TTL = 7 * 24 * 3600  # Seconds
+CHAT_RESPONSE_CACHE_MAX_MB = 50
+
 # Temperature (0 = very focused/factual, 0.3 = balanced, 1 = creative)
 # Lower = less hallucination, more factual
 TEMPERATURE = 0.1
 
+# Shared chat client (one per process, see chat_client.py)
+CHAT_MAX_CONCURRENT_REQUESTS = 8   # API requests in flight at once
+CHAT_MAX_QUEUED_REQUESTS = 64      # Waiting requests before "busy" errors
+CHAT_MAX_CONNECTIONS = 16          # Pooled keep-alive HTTP connections
+CHAT_REQUEST_TIMEOUT = 120         # Seconds
+
 # =============================================================================
 # APP SETTINGS
 # =============================================================================
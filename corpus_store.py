@@ -0,0 +1,194 @@
+"""
+Corpus Store Module
+Bhruhat Trayi AI Assistant by PraKul
+
+Compact, read-only columnar copy of the śloka table for display and
+prompt formatting:
+1. Low-cardinality text columns (File Name, Sthana, Chapter) are stored
+   as integer codes into a small list of categories
+2. Long text columns (Sloka Text, IAST, ...) are one UTF-8 blob per column
+   plus an offsets array - no Python object per cell
+3. Numeric columns stay NumPy arrays
+
+Rows are addressed by the same row ids the search engine returns
+(`_row_id`), so a field is read in O(1) and a whole result list is
+gathered column by column.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+# Always stored as categorical codes
+CATEGORICAL_COLUMNS = ['File Name', 'Sthana', 'Chapter']
+
+# Other text columns become categorical when at most this share of values is unique
+CATEGORICAL_MAX_UNIQUE_RATIO = 0.5
+
+
+# =============================================================================
+# COLUMN CLASSES
+# =============================================================================
+
+class CategoricalColumn:
+    """Integer codes into a list of distinct values (missing = '')"""
+
+    def __init__(self, codes: np.ndarray, categories: List[str]):
+        self.codes = codes
+        self.categories = categories
+
+    @classmethod
+    def from_series(cls, series: pd.Series) -> "CategoricalColumn":
+        codes, uniques = pd.factorize(series.fillna('').astype(str))
+        dtype = np.int16 if len(uniques) < np.iinfo(np.int16).max else np.int32
+        return cls(codes.astype(dtype), list(uniques))
+
+    def get(self, row: int) -> str:
+        return self.categories[self.codes[row]]
+
+    def gather(self, rows: np.ndarray) -> List[str]:
+        categories = self.categories
+        return [categories[c] for c in self.codes[rows]]
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + sum(len(c.encode('utf-8')) for c in self.categories)
+
+
+class TextColumn:
+    """UTF-8 blob + offsets: row i is blob[offsets[i]:offsets[i + 1]] (missing = '')"""
+
+    def __init__(self, blob: bytes, offsets: np.ndarray):
+        self.blob = blob
+        self.offsets = offsets
+
+    @classmethod
+    def from_series(cls, series: pd.Series) -> "TextColumn":
+        encoded = [value.encode('utf-8') for value in series.fillna('').astype(str)]
+        lengths = np.fromiter((len(e) for e in encoded), dtype=np.int64, count=len(encoded))
+        offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        return cls(b''.join(encoded), offsets)
+
+    def get(self, row: int) -> str:
+        return self.blob[self.offsets[row]:self.offsets[row + 1]].decode('utf-8')
+
+    def gather(self, rows: np.ndarray) -> List[str]:
+        blob, starts, ends = self.blob, self.offsets[rows], self.offsets[rows + 1]
+        return [blob[s:e].decode('utf-8') for s, e in zip(starts.tolist(), ends.tolist())]
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.blob) + self.offsets.nbytes
+
+
+class NumericColumn:
+    """Plain NumPy array (values returned as Python scalars)"""
+
+    def __init__(self, values: np.ndarray):
+        self.values = values
+
+    @classmethod
+    def from_series(cls, series: pd.Series) -> "NumericColumn":
+        return cls(series.to_numpy())
+
+    def get(self, row: int):
+        return self.values[row].item()
+
+    def gather(self, rows: np.ndarray) -> list:
+        return self.values[rows].tolist()
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes
+
+
+# =============================================================================
+# CORPUS STORE CLASS
+# =============================================================================
+
+class CorpusStore:
+    """Read-only columnar śloka table with O(1) row access by row id"""
+
+    def __init__(self, columns: Dict[str, Union[CategoricalColumn, TextColumn, NumericColumn]], n_rows: int):
+        self._columns = columns
+        self.n_rows = n_rows
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> "CorpusStore":
+        """Build from the śloka DataFrame (row id = position in df)"""
+        columns = {}
+        for name in df.columns:
+            series = df[name]
+            if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+                columns[name] = NumericColumn.from_series(series)
+            elif name in CATEGORICAL_COLUMNS or series.nunique() <= CATEGORICAL_MAX_UNIQUE_RATIO * len(series):
+                columns[name] = CategoricalColumn.from_series(series)
+            else:
+                columns[name] = TextColumn.from_series(series)
+        return cls(columns, len(df))
+
+    def __len__(self) -> int:
+        return self.n_rows
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._columns)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the store"""
+        return sum(column.nbytes for column in self._columns.values())
+
+    def get(self, row: int, column: str, default=None):
+        """One field of one row"""
+        if column not in self._columns:
+            return default
+        return self._columns[column].get(row)
+
+    def gather(self, column: str, rows: Iterable[int]) -> list:
+        """One field for several rows (in the given order)"""
+        return self._columns[column].gather(_as_rows(rows))
+
+    def categories(self, column: str) -> List[str]:
+        """Distinct values of a categorical column"""
+        return list(self._columns[column].categories)
+
+    def record(self, row: int) -> Dict:
+        """All fields of one row as a dict (plus its _row_id)"""
+        record = {name: column.get(row) for name, column in self._columns.items()}
+        record['_row_id'] = int(row)
+        return record
+
+    def records(self, rows: Iterable[int], columns: Optional[Sequence[str]] = None) -> List[Dict]:
+        """Several rows as dicts, gathered column by column"""
+        rows = _as_rows(rows)
+        names = list(columns) if columns is not None else self.columns
+        values = [self._columns[name].gather(rows) for name in names]
+
+        records = [dict(zip(names, row_values)) for row_values in zip(*values)] if names else [{} for _ in rows]
+        for record, row in zip(records, rows.tolist()):
+            record['_row_id'] = row
+        return records
+
+
+# =============================================================================
+# HELPER FUNCTIONS
+# =============================================================================
+
+def _as_rows(rows: Iterable[int]) -> np.ndarray:
+    """Row ids as an int64 array"""
+    if isinstance(rows, (np.ndarray, pd.Series, list, tuple)):
+        return np.asarray(rows, dtype=np.int64)
+    return np.fromiter(rows, dtype=np.int64)
+
+
+def as_records(slokas) -> List[Dict]:
+    """Śloka records from a records list or a results DataFrame"""
+    if isinstance(slokas, pd.DataFrame):
+        return slokas.to_dict('records')
+    return list(slokas)
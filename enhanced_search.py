@@ -14,10 +14,18 @@ This module combines:
 import pandas as pd
 import numpy as np
 from pathlib import Path
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, Sequence
 import re
+import copy
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 from query_analyzer import QueryAnalyzer, ResultBalancer, analyze_query
+from vector_store import VectorStore, quantized_paths
+from ann_index import IVFIndex
+from keyword_index import InvertedIndex, load_or_build_index
+from cache_utils import TTLCache
 
 
 # =============================================================================
@@ -28,6 +36,69 @@ APP_DIR = Path(__file__).parent
 
 # Embedding files
 EMBEDDINGS_PATH = APP_DIR / "sloka_embeddings.npy"
+ANN_INDEX_PATH = APP_DIR / "sloka_ann_index.npz"
+
+# Embedding precision: "float32" (sloka_embeddings.npy) or a quantized copy
+# built by setup_embeddings.py ("float16" = 1/2 size, "int8" = 1/4 size)
+EMBEDDING_PRECISION = "float32"
+# Rescore quantized top candidates with sloka_embeddings.npy when present
+RESCORE_FULL_PRECISION = True
+
+# Inverted index for keyword search (rebuilt automatically when the corpus changes)
+KEYWORD_INDEX_PATH = APP_DIR / "sloka_keyword_index.npz"
+
+# Keyword ranking: "bm25" (BM25F over the text fields) or "count" (matched terms)
+KEYWORD_RANKING = "bm25"
+# BM25 ranks well enough that fewer candidates need boosting
+KEYWORD_CANDIDATES_PER_RESULT = 4
+
+# Retrieval mode:
+# - "auto": semantic when embeddings are loaded, else keyword
+# - "semantic" / "keyword": one retriever only
+# - "hybrid": both retrievers, fused with reciprocal rank fusion
+SEARCH_MODE = "auto"
+SEARCH_MODES = ["auto", "semantic", "keyword", "hybrid"]
+
+# First-stage candidates per query (at least 2x max_results are always fetched)
+SEMANTIC_CANDIDATES = 100
+
+# Reciprocal rank fusion: score = sum(weight / (RRF_K + rank))
+RRF_K = 60
+HYBRID_SEMANTIC_WEIGHT = 1.0
+HYBRID_KEYWORD_WEIGHT = 1.0
+
+# Load the model + embeddings in a background thread; searches use
+# keyword retrieval until semantic search is ready
+BACKGROUND_SEMANTIC_LOAD = True
+
+# Approximate nearest-neighbour search (built by setup_embeddings.py)
+# Below ANN_MIN_VECTORS the exact scan is already fast, so ANN is skipped.
+USE_ANN_INDEX = True
+ANN_MIN_VECTORS = 50_000
+ANN_NPROBE = 16  # Higher = better recall, slower queries
+
+# UI Samhita names → 'File Name' values in the database
+SAMHITA_NAME_MAP = {
+    "Charaka Saṃhitā": "Charaka Samhita",
+    "Suśruta Saṃhitā": "Sushruta Samhita",
+    "Aṣṭāṅga Hṛdaya": "Astanga Hrudaya"
+}
+
+# Query embedding cache (example/suggestion buttons repeat the same queries)
+QUERY_EMBEDDING_CACHE_SIZE = 1024
+QUERY_EMBEDDING_CACHE_TTL = 6 * 3600  # seconds
+
+# Shared result cache for repeated (query, filters, limit) searches
+RESULT_CACHE_SIZE = 512
+RESULT_CACHE_TTL = 3600  # seconds
+
+# Bump when ranking logic changes so cached results are not reused
+SEARCH_ENGINE_VERSION = 1
+
+# Columns the shared engine (get_search_engine) keeps for result rows once
+# its indexes are built; the śloka text is read by _row_id from the app's
+# CorpusStore. Engines built directly keep every column by default.
+RESULT_COLUMNS = ['File Name', 'Sthana', 'Chapter', 'Chapter_Number', 'Sloka_Number_Int']
 
 # Sthana name normalization (handle variations in database)
 STHANA_NORMALIZATION = {
@@ -77,32 +148,160 @@ class EnhancedSearch:
     Enhanced search combining semantic search with intelligent prioritization
     """
     
-    def __init__(self, df: pd.DataFrame):
-        self.df = df
+    def __init__(self, df: pd.DataFrame, embedding_precision: Optional[str] = None,
+                 background_load: Optional[bool] = None,
+                 result_columns: Optional[List[str]] = None,
+                 corpus_version=None,
+                 keyword_index_path: Optional[Path] = KEYWORD_INDEX_PATH):
+        # Row positions are used as ids by all indexes
+        self.df = df.reset_index(drop=True)
+        self.n_rows = len(self.df)
+        self.signature = _corpus_signature(df)
+        self.corpus_version = corpus_version  # Caller's id of the corpus (e.g. file mtime)
+        self.embedding_precision = embedding_precision or EMBEDDING_PRECISION
+        self.embeddings_stamp = _embeddings_stamp(self.embedding_precision)
         self.analyzer = QueryAnalyzer()
         self.balancer = ResultBalancer()
         
+        # Keyword index (always available, also used without embeddings; not persisted if path is None)
+        self.keyword_index: InvertedIndex = load_or_build_index(self.df, keyword_index_path)
+        self.keyword_ranking = KEYWORD_RANKING
+        self.search_mode = SEARCH_MODE
+        
+        # Runs semantic and keyword retrieval side by side in hybrid mode
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="search")
+        
+        # Columnar features for vectorized boosting and filtering
+        self._build_boost_features()
+        self._build_samhita_masks()
+        
+        # Indexes are built: keep only the (compact) columns results need
+        self.result_columns = result_columns
+        if result_columns is not None:
+            self.df = compact_columns(self.df, result_columns)
+        
         # Load embeddings if available
-        self.embeddings = None
+        self.vectors: Optional[VectorStore] = None
+        self.ann_index: Optional[IVFIndex] = None
+        self.ann_nprobe = ANN_NPROBE
+        self.ann_min_vectors = ANN_MIN_VECTORS
         self.model = None
-        self._load_embeddings()
+        self.embedding_cache = TTLCache(QUERY_EMBEDDING_CACHE_SIZE, QUERY_EMBEDDING_CACHE_TTL)
+        
+        # Identifies this corpus + embeddings in result cache keys (the
+        # resolved search method is part of the key, so keyword results
+        # served while loading never stand in for semantic ones)
+        self.version = hashlib.sha1(repr((
+            SEARCH_ENGINE_VERSION, self.signature, self.corpus_version,
+            self.keyword_index.fingerprint, self.embeddings_stamp
+        )).encode('utf-8')).hexdigest()[:16]
+        
+        # Set once semantic loading has finished (successfully or not)
+        self._semantic_loaded = threading.Event()
+        if background_load is None:
+            background_load = BACKGROUND_SEMANTIC_LOAD
+        if background_load:
+            threading.Thread(target=self._load_embeddings, name="semantic-loader", daemon=True).start()
+        else:
+            self._load_embeddings()
+    
+    def is_stale(self) -> bool:
+        """True if the embeddings file changed since this engine was built"""
+        return _embeddings_stamp(self.embedding_precision) != self.embeddings_stamp
+    
+    def _load_vectors(self) -> VectorStore:
+        """Open the embedding matrix in the configured precision"""
+        if self.embedding_precision == "float32":
+            # Memory-mapped (shared page cache); normalized once, not per query
+            return VectorStore.load(EMBEDDINGS_PATH)
+        
+        full_precision_path = None
+        if RESCORE_FULL_PRECISION and EMBEDDINGS_PATH.exists():
+            full_precision_path = EMBEDDINGS_PATH
+        vectors = VectorStore.load_quantized(EMBEDDINGS_PATH, self.embedding_precision, full_precision_path)
+        
+        # A copy left over from an older build would score stale rows
+        if EMBEDDINGS_PATH.exists():
+            full_rows = np.load(EMBEDDINGS_PATH, mmap_mode='r').shape[0]
+            if (_embeddings_file(self.embedding_precision).stat().st_mtime < EMBEDDINGS_PATH.stat().st_mtime
+                    or len(vectors) != full_rows):
+                print(f"⚠️ {self.embedding_precision} embeddings do not match {EMBEDDINGS_PATH.name}. "
+                      f"Using float32 (re-run setup_embeddings.py --quantize {self.embedding_precision}).")
+                return VectorStore.load(EMBEDDINGS_PATH)
+        return vectors
     
     def _load_embeddings(self):
         """Load embeddings and model for semantic search"""
-        if not EMBEDDINGS_PATH.exists():
+        try:
+            self._load_semantic_components()
+        finally:
+            self._semantic_loaded.set()
+    
+    def _load_semantic_components(self):
+        """Import sentence-transformers and open vectors, ANN index and model"""
+        if not _embeddings_file(self.embedding_precision).exists():
             print("⚠️ Embeddings not found. Using keyword search only.")
             return
         
         try:
             from sentence_transformers import SentenceTransformer
             
-            self.embeddings = np.load(EMBEDDINGS_PATH)
-            self.model = SentenceTransformer("sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
-            print("✅ Semantic search loaded successfully")
+            vectors = self._load_vectors()
+            model = SentenceTransformer("sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
         except ImportError:
             print("⚠️ sentence-transformers not installed. Using keyword search only.")
+            return
         except Exception as e:
             print(f"⚠️ Error loading embeddings: {e}")
+            return
+        
+        if len(vectors) != self.n_rows:
+            print(f"⚠️ Embeddings have {len(vectors)} rows, corpus has {self.n_rows}. "
+                  "Using keyword search only (re-run setup_embeddings.py).")
+            return
+        
+        self.ann_index = self._load_ann_index(vectors)
+        
+        # Model last: semantic_available flips only when everything is in place
+        self.vectors = vectors
+        self.model = model
+        print("✅ Semantic search loaded successfully")
+    
+    def _load_ann_index(self, vectors: VectorStore) -> Optional[IVFIndex]:
+        """The ANN index if present and built for the current embeddings"""
+        if not USE_ANN_INDEX or not ANN_INDEX_PATH.exists():
+            return None
+        
+        if ANN_INDEX_PATH.stat().st_mtime < _embeddings_file(self.embedding_precision).stat().st_mtime:
+            print("⚠️ ANN index is older than embeddings. Using exact search.")
+            return None
+        
+        try:
+            index = IVFIndex.load(ANN_INDEX_PATH)
+        except Exception as e:
+            print(f"⚠️ Error loading ANN index: {e}")
+            return None
+        
+        if index.n_vectors != len(vectors):
+            print("⚠️ ANN index does not match embeddings. Using exact search.")
+            return None
+        
+        print(f"✅ ANN index loaded ({index.n_lists} lists)")
+        return index
+    
+    @property
+    def semantic_loading(self) -> bool:
+        """True while the background loader is still running"""
+        return not self._semantic_loaded.is_set()
+    
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """Block until semantic loading has finished; returns semantic_available"""
+        self._semantic_loaded.wait(timeout)
+        return self.semantic_available
+    
+    def _use_ann(self) -> bool:
+        """ANN pays off only on large corpora; otherwise scan exactly"""
+        return self.ann_index is not None and len(self.vectors) >= self.ann_min_vectors
     
     def _normalize_sthana(self, sthana: str) -> str:
         """Normalize Sthana name for consistent matching"""
@@ -117,166 +316,296 @@ class EnhancedSearch:
         
         return sthana
     
-    def _get_sthana_boost(self, row, sthana_priority: Dict[str, int]) -> int:
-        """Get boost score based on Sthana priority"""
-        sthana = self._normalize_sthana(row.get('Sthana', ''))
+    def _build_boost_features(self):
+        """Precompute compact per-row codes used by sthana/chapter boosting"""
+        # Normalized sthana: one code per row into a small table of names
+        sthana_column = self.df['Sthana'] if 'Sthana' in self.df.columns else pd.Series([''] * len(self.df))
+        codes, categories = pd.factorize(sthana_column)
+        self._sthana_names = [self._normalize_sthana(c) for c in categories] + [""]
+        self._sthana_codes = np.where(codes < 0, len(categories), codes).astype(np.int32)
+        
+        # Lowercased chapter: one code per row into the unique chapter names
+        chapter_column = self.df['Chapter'] if 'Chapter' in self.df.columns else pd.Series([''] * len(self.df))
+        codes, categories = pd.factorize(chapter_column.fillna('').astype(str).str.lower())
+        self._chapter_names = list(categories)
+        self._chapter_codes = codes.astype(np.int32)
+    
+    def _build_samhita_masks(self):
+        """Precompute one boolean row mask per Samhita"""
+        file_names = self.df['File Name'] if 'File Name' in self.df.columns else pd.Series([''] * len(self.df))
+        codes, categories = pd.factorize(file_names)
+        self._samhita_row_masks = {name: codes == code for code, name in enumerate(categories)}
+        
+        # Masks for Samhita/Sthana combinations, filled on first use
+        self._combined_masks: Dict[Tuple[frozenset, frozenset], np.ndarray] = {}
+    
+    def _filter_mask(self, selected_samhitas: Optional[List[str]],
+                     selected_sthanas: Optional[List[str]] = None) -> Optional[np.ndarray]:
+        """Row mask for the selected Samhitas and Sthanas (None = no filter)"""
+        if not selected_samhitas and not selected_sthanas:
+            return None
+        
+        samhitas = frozenset(SAMHITA_NAME_MAP.get(s, s) for s in selected_samhitas or [])
+        sthanas = frozenset(self._normalize_sthana(s) for s in selected_sthanas or [])
+        key = (samhitas, sthanas)
+        
+        mask = self._combined_masks.get(key)
+        if mask is None:
+            mask = np.ones(len(self.df), dtype=bool)
+            
+            if samhitas:
+                samhita_mask = np.zeros(len(self.df), dtype=bool)
+                for name in samhitas:
+                    if name in self._samhita_row_masks:
+                        samhita_mask |= self._samhita_row_masks[name]
+                mask &= samhita_mask
+            
+            if sthanas:
+                codes = [code for code, name in enumerate(self._sthana_names) if name in sthanas]
+                mask &= np.isin(self._sthana_codes, codes)
+            
+            mask.setflags(write=False)
+            self._combined_masks[key] = mask
         
-        for priority_sthana, boost in sthana_priority.items():
-            if priority_sthana.lower() in sthana.lower():
-                return boost
+        return mask
+    
+    def _sthana_boosts(self, rows: np.ndarray, sthana_priority: Dict[str, int]) -> np.ndarray:
+        """Sthana priority boost for each row (table lookup per category)"""
+        table = np.zeros(len(self._sthana_names), dtype=np.float64)
+        
+        for code, sthana in enumerate(self._sthana_names):
+            for priority_sthana, boost in sthana_priority.items():
+                if priority_sthana.lower() in sthana.lower():
+                    table[code] = boost
+                    break
         
-        return 0
+        return table[self._sthana_codes[rows]]
     
-    def _get_chapter_boost(self, row, chapter_keywords: List[str]) -> int:
-        """Get boost score if chapter matches disease keywords"""
+    def _chapter_boosts(self, rows: np.ndarray, chapter_keywords: List[str]) -> np.ndarray:
+        """Boost of 100 for rows whose chapter matches a disease keyword"""
         if not chapter_keywords:
-            return 0
+            return np.zeros(len(rows), dtype=np.float64)
         
-        chapter = str(row.get('Chapter', '')).lower()
+        keywords = [k.lower() for k in chapter_keywords]
+        table = np.array([100.0 if any(k in chapter for k in keywords) else 0.0
+                          for chapter in self._chapter_names])
         
-        for keyword in chapter_keywords:
-            if keyword.lower() in chapter:
-                return 100  # High boost for matching chapter
-        
-        return 0
+        return table[self._chapter_codes[rows]]
     
-    def _semantic_search(self, query: str, top_k: int = 50) -> List[Tuple[int, float]]:
-        """Perform semantic search and return indices with scores"""
-        if self.model is None or self.embeddings is None:
-            return []
+    def _encode_query(self, query: str) -> np.ndarray:
+        """Query embedding, served from the LRU cache when possible"""
+        key = normalize_query(query)
         
-        from numpy.linalg import norm
+        embedding = self.embedding_cache.get(key)
+        if embedding is None:
+            embedding = self.model.encode([key], convert_to_numpy=True)[0]
+            embedding.setflags(write=False)
+            self.embedding_cache.set(key, embedding)
         
-        # Create query embedding
-        query_embedding = self.model.encode([query], convert_to_numpy=True)[0]
+        return embedding
+    
+    def _semantic_search(self, query: str, top_k: int = 50,
+                         mask: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """Perform semantic search and return indices with scores (only rows in mask)"""
+        if self.model is None or self.vectors is None:
+            return []
         
-        # Calculate similarities
-        similarities = []
-        for i, emb in enumerate(self.embeddings):
-            sim = np.dot(query_embedding, emb) / (norm(query_embedding) * norm(emb) + 1e-8)
-            similarities.append((i, float(sim)))
+        query_embedding = self._encode_query(query)
         
-        # Sort by similarity
-        similarities.sort(key=lambda x: x[1], reverse=True)
+        if self._use_ann():
+            results = self.ann_index.search(self.vectors, query_embedding,
+                                            top_k, self.ann_nprobe, mask)
+            # Probed lists too small: fall back to exact search
+            available = len(self.vectors) if mask is None else int(np.count_nonzero(mask))
+            if len(results) >= min(top_k, available):
+                return results
         
-        return similarities[:top_k]
+        # One matrix-vector product + argpartition top-k (filter applied before top-k)
+        return self.vectors.search(query_embedding, top_k, mask)
     
-    def _keyword_search(self, query: str, search_hints: List[str], top_k: int = 50) -> List[Tuple[int, float]]:
-        """Perform keyword search as fallback"""
-        results = []
-        
+    def _keyword_search(self, query: str, search_hints: List[str], top_k: int = 50,
+                        mask: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """Perform keyword search as fallback (only rows in mask)"""
         # Combine query words with search hints
         search_terms = query.lower().split() + [h.lower() for h in search_hints]
-        search_terms = list(set(search_terms))
         
-        for idx, row in self.df.iterrows():
-            score = 0
-            
-            # Search in all text columns
-            text_columns = ['Sloka Text', 'IAST', 'Roman', 'Chapter']
-            combined_text = ' '.join([str(row.get(col, '')).lower() for col in text_columns])
-            
-            for term in search_terms:
-                if term in combined_text:
-                    score += 1
-            
-            if score > 0:
-                results.append((idx, score))
+        # Posting-list lookups instead of scanning every row
+        results = self.keyword_index.search(search_terms, top_k, ranking=self.keyword_ranking, mask=mask)
         
-        # Sort by score
-        results.sort(key=lambda x: x[1], reverse=True)
+        if self.keyword_ranking == "bm25" and results:
+            # Scale to 0-1 (like cosine scores) so sthana/chapter boosts keep their weight
+            top_score = results[0][1]
+            results = [(idx, score / top_score) for idx, score in results]
         
-        return results[:top_k]
+        return results
+    
+    @property
+    def semantic_available(self) -> bool:
+        return self.model is not None and self.vectors is not None
+    
+    def similarity(self, query: str, rows: Sequence[int]) -> Optional[np.ndarray]:
+        """Cosine similarity of a query to the given rows (None until semantic search is loaded)"""
+        if not self.semantic_available:
+            return None
+        rows = np.asarray(rows, dtype=np.int64)
+        return self.vectors.score_rows(rows, self._encode_query(query)).astype(np.float64)
+    
+    def _resolve_mode(self, mode: Optional[str]) -> str:
+        """Pick the retrieval mode actually used for a query"""
+        mode = mode or self.search_mode
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {mode}")
+        
+        if not self.semantic_available:
+            return "keyword"
+        if mode == "auto":
+            return "semantic"
+        return mode
+    
+    def _hybrid_search(self, search_query: str, query: str, search_hints: List[str],
+                       top_k: int = 100, mask: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """Run semantic and keyword retrieval concurrently and fuse with RRF"""
+        semantic_future = self._executor.submit(self._semantic_search, search_query, top_k, mask)
+        keyword_future = self._executor.submit(self._keyword_search, query, search_hints, top_k, mask)
+        
+        return reciprocal_rank_fusion(
+            [semantic_future.result(), keyword_future.result()],
+            [HYBRID_SEMANTIC_WEIGHT, HYBRID_KEYWORD_WEIGHT]
+        )[:top_k]
     
     def search(self, query: str, max_results: int = 10, 
-               selected_samhitas: List[str] = None) -> Tuple[pd.DataFrame, Dict]:
+               selected_samhitas: List[str] = None,
+               mode: Optional[str] = None,
+               selected_sthanas: List[str] = None,
+               use_cache: bool = True) -> Tuple[pd.DataFrame, Dict]:
         """
         Main search function with enhanced prioritization
         
+        mode: one of SEARCH_MODES (default: self.search_mode)
+        selected_sthanas: optional Sthana filter (e.g. ["Chikitsasthana"])
+        use_cache: serve repeated searches from the shared result cache
+        
+        Samhita/Sthana filters are applied before top-k selection, so at
+        least max_results * 2 candidates are returned whenever they exist.
+        
         Returns:
             - results DataFrame
             - query analysis dict
         """
+        search_method = self._resolve_mode(mode)
+        
+        if not use_cache:
+            return self._search(query, max_results, selected_samhitas, search_method, selected_sthanas)
+        
+        key = (
+            self.version, normalize_query(query),
+            tuple(sorted(selected_samhitas or [])), tuple(sorted(selected_sthanas or [])),
+            max_results, search_method, self.keyword_ranking, self.ann_nprobe
+        )
+        
+        cached = RESULT_CACHE.get(key)
+        if cached is not None:
+            row_ids, score_columns, analysis = cached
+            return self._rows_to_results(row_ids, score_columns), copy.copy(analysis)
+        
+        results, analysis = self._search(query, max_results, selected_samhitas, search_method, selected_sthanas)
+        
+        # Store row ids + scores, not the DataFrame itself
+        if len(results) > 0:
+            row_ids = results['_row_id'].to_numpy()
+            score_columns = {col: results[col].to_numpy() for col in RESULT_SCORE_COLUMNS}
+        else:
+            row_ids, score_columns = None, {}
+        RESULT_CACHE.set(key, (row_ids, score_columns, copy.copy(analysis)))
+        
+        return results, analysis
+    
+    def _rows_to_results(self, row_ids: Optional[np.ndarray], score_columns: Dict[str, np.ndarray]) -> pd.DataFrame:
+        """Rebuild a results DataFrame from cached row ids"""
+        if row_ids is None:
+            return pd.DataFrame()
+        
+        results = self.df.iloc[row_ids].reset_index(drop=True)
+        results['_row_id'] = row_ids
+        for col, values in score_columns.items():
+            results[col] = values
+        return results
+    
+    def _search(self, query: str, max_results: int, selected_samhitas: Optional[List[str]],
+                mode: str, selected_sthanas: Optional[List[str]]) -> Tuple[pd.DataFrame, Dict]:
+        """Uncached search pipeline (see search())"""
         
         # Step 1: Analyze query
         analysis = self.analyzer.analyze(query)
         
-        # Step 2: Filter by samhita if specified
-        if selected_samhitas:
-            samhita_map = {
-                "Charaka Saṃhitā": "Charaka Samhita",
-                "Suśruta Saṃhitā": "Sushruta Samhita",
-                "Aṣṭāṅga Hṛdaya": "Astanga Hrudaya"
-            }
-            selected_internal = [samhita_map.get(s, s) for s in selected_samhitas]
-            working_df = self.df[self.df['File Name'].isin(selected_internal)].copy()
-        else:
-            working_df = self.df.copy()
+        # Step 2: Filter by samhita/sthana if specified (precomputed mask, no copies)
+        mask = self._filter_mask(selected_samhitas, selected_sthanas)
         
-        if len(working_df) == 0:
+        if mask is not None and not mask.any():
             return pd.DataFrame(), analysis
         
-        # Step 3: Perform semantic search (or keyword fallback)
+        # Step 3: Perform semantic search (or keyword fallback, or both)
         search_query = query
         if analysis['search_hints']:
             search_query = query + ' ' + ' '.join(analysis['search_hints'][:5])
         
-        if self.model is not None and self.embeddings is not None:
+        search_method = self._resolve_mode(mode)
+        candidate_k = max(SEMANTIC_CANDIDATES, max_results * 2)
+        
+        if search_method == "hybrid":
+            # Semantic + lexical, fused before boosting
+            candidates = self._hybrid_search(search_query, query, analysis['search_hints'],
+                                             top_k=candidate_k, mask=mask)
+        elif search_method == "semantic":
             # Semantic search
-            semantic_results = self._semantic_search(search_query, top_k=100)
-            initial_indices = [idx for idx, score in semantic_results if idx in working_df.index]
-            initial_scores = {idx: score for idx, score in semantic_results}
-            search_method = "semantic"
+            candidates = self._semantic_search(search_query, top_k=candidate_k, mask=mask)
         else:
             # Keyword fallback
-            keyword_results = self._keyword_search(query, analysis['search_hints'], top_k=100)
-            initial_indices = [idx for idx, score in keyword_results if idx in working_df.index]
-            initial_scores = {idx: score for idx, score in keyword_results}
-            search_method = "keyword"
+            keyword_top_k = candidate_k
+            if self.keyword_ranking == "bm25":
+                keyword_top_k = max_results * KEYWORD_CANDIDATES_PER_RESULT
+            candidates = self._keyword_search(query, analysis['search_hints'],
+                                              top_k=keyword_top_k, mask=mask)
         
-        if len(initial_indices) == 0:
+        if len(candidates) == 0:
             return pd.DataFrame(), analysis
         
-        # Step 4: Apply priority boosting
-        boosted_scores = []
+        # Step 4: Apply priority boosting (vectorized over all candidates)
+        rows = np.array([idx for idx, score in candidates], dtype=np.int64)
+        base_scores = np.array([score for idx, score in candidates], dtype=np.float64)
         
-        for idx in initial_indices:
-            row = self.df.loc[idx]
-            
-            base_score = initial_scores.get(idx, 0)
-            
-            # Apply Sthana boost
-            sthana_boost = self._get_sthana_boost(row, analysis['sthana_priority'])
-            
-            # Apply Chapter boost (for disease queries)
-            chapter_boost = self._get_chapter_boost(row, analysis['chapter_keywords'])
-            
-            # Calculate final score
-            final_score = (base_score * 100) + sthana_boost + chapter_boost
-            
-            boosted_scores.append((idx, final_score, sthana_boost, chapter_boost))
+        sthana_boosts = self._sthana_boosts(rows, analysis['sthana_priority'])
+        chapter_boosts = self._chapter_boosts(rows, analysis['chapter_keywords'])
+        final_scores = (base_scores * 100) + sthana_boosts + chapter_boosts
         
-        # Step 5: Sort by boosted score
-        boosted_scores.sort(key=lambda x: x[1], reverse=True)
+        # Step 5: Sort by boosted score (stable: ties keep retrieval order)
+        order = np.argsort(-final_scores, kind='stable')[:max_results * 2]
         
         # Step 6: Get top results
-        top_indices = [idx for idx, score, sb, cb in boosted_scores[:max_results * 2]]
-        results = self.df.loc[top_indices].copy()
+        results = self.df.iloc[rows[order]].copy()
         
-        # Add scores for debugging
-        score_map = {idx: (score, sb, cb) for idx, score, sb, cb in boosted_scores}
-        results['_total_score'] = results.index.map(lambda x: score_map.get(x, (0, 0, 0))[0])
-        results['_sthana_boost'] = results.index.map(lambda x: score_map.get(x, (0, 0, 0))[1])
-        results['_chapter_boost'] = results.index.map(lambda x: score_map.get(x, (0, 0, 0))[2])
+        # Add row ids (for caching) and scores for debugging
+        results['_row_id'] = rows[order]
+        results['_total_score'] = final_scores[order]
+        results['_sthana_boost'] = sthana_boosts[order]
+        results['_chapter_boost'] = chapter_boosts[order]
         
         # Step 7: Balance results (for treatment queries)
         results = self.balancer.balance_results(results, analysis, max_results)
         
         # Add search method to analysis
         analysis['search_method'] = search_method
+        analysis['semantic_loading'] = search_method == "keyword" and self.semantic_loading
         
         return results, analysis
     
+    def cache_stats(self) -> Dict[str, Dict]:
+        """Hit/miss counters of the engine caches"""
+        return {
+            "query_embeddings": self.embedding_cache.stats(),
+            "results": RESULT_CACHE.stats(),
+        }
+    
     def get_search_explanation(self, analysis: Dict) -> str:
         """Generate human-readable explanation of search logic"""
         lines = []
@@ -298,16 +627,153 @@ class EnhancedSearch:
             lines.append(f"⚠️ **Including Nidāna as Apathya** (causes = what to avoid)")
         
         if analysis.get('search_method'):
-            method_emoji = "🧠" if analysis['search_method'] == 'semantic' else "🔤"
+            method_emoji = {"semantic": "🧠", "hybrid": "🧬"}.get(analysis['search_method'], "🔤")
             lines.append(f"{method_emoji} **Search Method:** {analysis['search_method'].title()}")
         
+        if analysis.get('semantic_loading'):
+            lines.append("⏳ **AI semantic search is still loading** - showing keyword matches")
+        
         return '\n'.join(lines)
 
 
+# =============================================================================
+# HELPER FUNCTIONS
+# =============================================================================
+
+def normalize_query(query: str) -> str:
+    """Collapse whitespace so trivially different queries share cache entries"""
+    return ' '.join(query.split())
+
+
+# =============================================================================
+# RESULT FUSION
+# =============================================================================
+
+def reciprocal_rank_fusion(ranked_lists: List[List[Tuple[int, float]]],
+                           weights: List[float] = None,
+                           k: int = RRF_K) -> List[Tuple[int, float]]:
+    """
+    Fuse ranked (idx, score) lists with reciprocal rank fusion
+    
+    Fused scores are scaled to 0-1 (1 = ranked first by every retriever),
+    so they combine with sthana/chapter boosts like cosine scores do.
+    """
+    if weights is None:
+        weights = [1.0] * len(ranked_lists)
+    
+    fused = {}
+    for ranked, weight in zip(ranked_lists, weights):
+        for rank, (idx, _) in enumerate(ranked, start=1):
+            fused[idx] = fused.get(idx, 0.0) + weight / (k + rank)
+    
+    best_possible = sum(weights) / (k + 1)
+    results = [(idx, score / best_possible) for idx, score in fused.items()]
+    results.sort(key=lambda x: x[1], reverse=True)
+    
+    return results
+
+
+# =============================================================================
+# RESULT COLUMNS
+# =============================================================================
+
+def compact_columns(df: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+    """The given columns only, text ones stored as categoricals"""
+    kept = df[[c for c in columns if c in df.columns]]
+    return kept.astype({c: 'category' for c in kept.columns if not pd.api.types.is_numeric_dtype(kept[c])})
+
+
+def attach_columns(results: pd.DataFrame, df: pd.DataFrame) -> pd.DataFrame:
+    """Add the columns of df that an engine dropped back onto its results"""
+    missing = [c for c in df.columns if c not in results.columns]
+    if len(results) == 0 or not missing:
+        return results
+    extra = df.reset_index(drop=True).iloc[results['_row_id'].to_numpy()][missing].reset_index(drop=True)
+    return pd.concat([results.reset_index(drop=True), extra], axis=1)
+
+
 # =============================================================================
 # CONVENIENCE FUNCTIONS
 # =============================================================================
 
+# Process-wide search engine (embeddings + model are loaded once and shared)
+_ENGINE: Optional[EnhancedSearch] = None
+_ENGINE_LOCK = threading.Lock()
+
+# Shared by all engines; keys include the engine version, so results of a
+# replaced corpus/embeddings are never served and simply age out
+RESULT_CACHE = TTLCache(RESULT_CACHE_SIZE, RESULT_CACHE_TTL)
+RESULT_SCORE_COLUMNS = ['_total_score', '_sthana_boost', '_chapter_boost']
+
+
+def _corpus_signature(df: pd.DataFrame) -> str:
+    """Content hash of a corpus (any edited cell, row or column changes it)"""
+    digest = hashlib.sha1(repr((len(df), tuple(df.columns))).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _file_stamp(path: Path) -> Optional[Tuple[int, int]]:
+    """(mtime, size) of a file, or None if missing"""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _embeddings_file(precision: str) -> Path:
+    """Embeddings file scored at the given precision"""
+    if precision == "float32":
+        return EMBEDDINGS_PATH
+    return quantized_paths(EMBEDDINGS_PATH, precision)[0]
+
+
+def _embeddings_stamp(precision: str) -> Tuple:
+    """Stamps of every embeddings file the engine reads"""
+    return (_file_stamp(EMBEDDINGS_PATH), _file_stamp(_embeddings_file(precision)))
+
+
+def _engine_is_current(engine: Optional[EnhancedSearch], df: pd.DataFrame, corpus_version=None) -> bool:
+    if engine is None or engine.is_stale():
+        return False
+    if corpus_version is not None:
+        return engine.corpus_version == corpus_version
+    return engine.signature == _corpus_signature(df)
+
+
+def get_search_engine(df: pd.DataFrame, corpus_version=None) -> EnhancedSearch:
+    """
+    Get the shared search engine for this process
+
+    The engine is created on first use and reused by every later search,
+    so the embedding matrix and the SentenceTransformer model are loaded
+    exactly once. It is rebuilt only if a different corpus is passed in or
+    the embeddings file changes on disk. The corpus is compared by content
+    hash (computed once per engine, and per call for the passed df), or by
+    corpus_version when the caller provides one (e.g. the database file's
+    mtime), which skips hashing.
+
+    Its results carry only RESULT_COLUMNS (plus _row_id and scores).
+    """
+    global _ENGINE
+    
+    engine = _ENGINE
+    if _engine_is_current(engine, df, corpus_version):
+        return engine
+    
+    with _ENGINE_LOCK:
+        # Another thread may have built it while we were waiting
+        if not _engine_is_current(_ENGINE, df, corpus_version):
+            _ENGINE = EnhancedSearch(df, result_columns=RESULT_COLUMNS, corpus_version=corpus_version)
+        return _ENGINE
+
+
+def get_loaded_search_engine() -> Optional[EnhancedSearch]:
+    """The shared engine if one has been built (never builds or loads anything)"""
+    return _ENGINE
+
+
 def create_enhanced_search(df: pd.DataFrame) -> EnhancedSearch:
     """Create an enhanced search instance"""
     return EnhancedSearch(df)
@@ -323,8 +789,9 @@ def enhanced_search(df: pd.DataFrame, query: str, max_results: int = 10,
         - query analysis dict
         - search explanation string
     """
-    searcher = EnhancedSearch(df)
+    searcher = get_search_engine(df)
     results, analysis = searcher.search(query, max_results, selected_samhitas)
+    results = attach_columns(results, df)
     explanation = searcher.get_search_explanation(analysis)
     
     return results, analysis, explanation
@@ -368,12 +835,16 @@ if __name__ == "__main__":
         "What is Vata?"
     ]
     
+    # Sample corpus: never overwrite the app's persisted keyword index
+    searcher = EnhancedSearch(df, background_load=False, keyword_index_path=None)
+    
     for query in test_queries:
         print(f"\n{'='*60}")
         print(f"Query: {query}")
         print(f"{'='*60}")
         
-        results, analysis, explanation = enhanced_search(df, query, max_results=5)
+        results, analysis = searcher.search(query, max_results=5)
+        explanation = searcher.get_search_explanation(analysis)
         
         print(explanation)
         print(f"\nResults: {len(results)} ślokas found")
@@ -0,0 +1,284 @@
+"""
+Keyword Index Module
+Bhruhat Trayi AI Assistant by PraKul
+
+Inverted index for the keyword (non-semantic) search path:
+1. Each text field is lowercased and split on whitespace into tokens
+2. token → posting list of row ids, with per-field term frequencies
+3. A query term matches a row if it is a substring of one of its tokens
+   (Sanskrit compounds: "चिकित्सा" must match "प्रमेहचिकित्सा"), so each
+   term is first expanded against the vocabulary, then posting lists are
+   merged with NumPy instead of scanning the corpus
+4. Rows are ranked either by the number of matched terms ("count") or
+   by BM25F with per-field weights ("bm25"), using document lengths and
+   IDF tables precomputed when the index is loaded
+
+Terms containing spaces (e.g. "digestive fire") match rows that contain
+every word of the term.
+"""
+
+import hashlib
+import os
+import re
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+# Columns indexed for keyword search (order = field number)
+INDEX_FIELDS = ['Sloka Text', 'IAST', 'Roman', 'Chapter']
+
+# Cached vocabulary expansions per index (cleared when full)
+MAX_EXPANSION_CACHE = 4096
+
+# BM25F parameters: per-field weight and length normalization (b)
+BM25_K1 = 1.2
+BM25_FIELD_WEIGHTS = {'Sloka Text': 1.0, 'IAST': 1.0, 'Roman': 0.5, 'Chapter': 1.5}
+BM25_FIELD_B = {'Sloka Text': 0.75, 'IAST': 0.75, 'Roman': 0.75, 'Chapter': 0.3}
+
+
+# =============================================================================
+# INVERTED INDEX CLASS
+# =============================================================================
+
+class InvertedIndex:
+    """Token → rows posting lists (CSR layout) with per-field term frequencies"""
+
+    def __init__(self, vocab_blob: str, postings_offsets: np.ndarray, postings_rows: np.ndarray,
+                 postings_tf: np.ndarray, field_lengths: np.ndarray, fingerprint: str,
+                 fields: List[str] = INDEX_FIELDS):
+        self.vocab_blob = vocab_blob
+        self.postings_offsets = postings_offsets
+        self.postings_rows = postings_rows
+        self.postings_tf = postings_tf
+        self.field_lengths = field_lengths
+        self.fingerprint = fingerprint
+
+        # Start offset of every token inside the newline-joined vocabulary
+        vocab = vocab_blob.split('\n') if vocab_blob else []
+        lengths = np.fromiter((len(t) + 1 for t in vocab), dtype=np.int64, count=len(vocab))
+        self._token_starts = np.concatenate([[0], np.cumsum(lengths)[:-1]]) if len(vocab) else lengths
+        self._token_ids = {token: i for i, token in enumerate(vocab)}
+        self._expansion_cache: Dict[str, np.ndarray] = {}
+
+        self._precompute_bm25(fields)
+
+    def _precompute_bm25(self, fields: List[str]):
+        """Per-token IDF and per-(row, field) length normalization tables"""
+        doc_freq = np.diff(self.postings_offsets)
+        self.token_idf = bm25_idf(doc_freq, self.n_docs)
+
+        weights = np.array([BM25_FIELD_WEIGHTS.get(f, 1.0) for f in fields], dtype=np.float32)
+        b = np.array([BM25_FIELD_B.get(f, 0.75) for f in fields], dtype=np.float32)
+        avg_lengths = np.maximum(self.field_lengths.mean(axis=0), 1e-6) if self.n_docs else np.ones(len(fields))
+
+        # weight_f / (1 - b_f + b_f * len_f / avglen_f), applied to raw field tf
+        self.field_factors = (weights / (1 - b + b * self.field_lengths / avg_lengths)).astype(np.float32)
+
+    @property
+    def n_docs(self) -> int:
+        return self.field_lengths.shape[0]
+
+    @property
+    def n_tokens(self) -> int:
+        return len(self._token_ids)
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, fields: List[str] = INDEX_FIELDS) -> "InvertedIndex":
+        """Tokenize the text fields of every row and build posting lists"""
+        n_docs = len(df)
+        vocab: Dict[str, int] = {}
+        token_ids, rows, field_ids = [], [], []
+        field_lengths = np.zeros((n_docs, len(fields)), dtype=np.int32)
+
+        for f, column in enumerate(fields):
+            for row, tokens in enumerate(_field_tokens(df, column)):
+                field_lengths[row, f] = len(tokens)
+                for token in tokens:
+                    token_ids.append(vocab.setdefault(token, len(vocab)))
+                rows.extend([row] * len(tokens))
+                field_ids.extend([f] * len(tokens))
+
+        token_ids = np.asarray(token_ids, dtype=np.int64)
+        rows = np.asarray(rows, dtype=np.int64)
+        field_ids = np.asarray(field_ids, dtype=np.int64)
+
+        # One posting per (token, row), sorted by token then row
+        keys, inverse = np.unique(token_ids * max(n_docs, 1) + rows, return_inverse=True)
+        postings_tf = np.zeros((len(keys), len(fields)), dtype=np.int32)
+        np.add.at(postings_tf, (inverse, field_ids), 1)
+
+        posting_tokens = keys // max(n_docs, 1)
+        postings_rows = (keys % max(n_docs, 1)).astype(np.int32)
+        postings_offsets = np.searchsorted(posting_tokens, np.arange(len(vocab) + 1)).astype(np.int64)
+
+        return cls('\n'.join(vocab), postings_offsets, postings_rows, postings_tf,
+                   field_lengths, corpus_fingerprint(df, fields))
+
+    def expand(self, term: str) -> np.ndarray:
+        """Ids of all vocabulary tokens that contain the term"""
+        cached = self._expansion_cache.get(term)
+        if cached is not None:
+            return cached
+
+        starts = [m.start() for m in re.finditer(re.escape(term), self.vocab_blob)]
+        token_ids = np.unique(np.searchsorted(self._token_starts, starts, side='right') - 1)
+
+        if len(self._expansion_cache) >= MAX_EXPANSION_CACHE:
+            self._expansion_cache.clear()
+        self._expansion_cache[term] = token_ids
+        return token_ids
+
+    def term_rows(self, term: str) -> np.ndarray:
+        """Sorted unique rows matched by a term"""
+        words = term.split()
+        if not words:
+            return np.empty(0, dtype=np.int32)
+
+        matched = None
+        for word in words:
+            rows = self._union_rows(self.expand(word))
+            matched = rows if matched is None else np.intersect1d(matched, rows, assume_unique=True)
+        return matched
+
+    def _posting_positions(self, token_ids: np.ndarray) -> np.ndarray:
+        """Positions in the postings arrays of all postings of several tokens"""
+        starts = self.postings_offsets[token_ids]
+        lengths = self.postings_offsets[token_ids + 1] - starts
+        if len(lengths) == 0:
+            return np.empty(0, dtype=np.int64)
+        # Concatenated aranges: start_i, start_i + 1, ..., start_i + length_i - 1
+        shifts = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+        return shifts + np.arange(lengths.sum())
+
+    def _union_rows(self, token_ids: np.ndarray) -> np.ndarray:
+        """Union of the posting lists of several tokens"""
+        return np.unique(self.postings_rows[self._posting_positions(token_ids)])
+
+    def _term_bm25(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Matched rows and their BM25F score contribution for one term"""
+        words = term.split()
+        rows = self.term_rows(term)
+        if len(rows) == 0:
+            return rows, np.empty(0, dtype=np.float32)
+
+        # Single exact token: use the precomputed IDF table
+        token_id = self._token_ids.get(term)
+        if len(words) == 1 and token_id is not None and len(self.expand(term)) == 1:
+            idf = self.token_idf[token_id]
+        else:
+            idf = bm25_idf(len(rows), self.n_docs)
+
+        # Weighted, length-normalized term frequency summed over all matching tokens
+        pseudo_tf = np.zeros(self.n_docs, dtype=np.float32)
+        for word in words:
+            positions = self._posting_positions(self.expand(word))
+            posting_rows = self.postings_rows[positions]
+            weighted = (self.postings_tf[positions] * self.field_factors[posting_rows]).sum(axis=1)
+            pseudo_tf += np.bincount(posting_rows, weights=weighted, minlength=self.n_docs).astype(np.float32)
+
+        tf = pseudo_tf[rows]
+        return rows, idf * tf * (BM25_K1 + 1) / (tf + BM25_K1)
+
+    def search(self, terms: Iterable[str], top_k: int = 50, ranking: str = "count",
+               mask: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """
+        Rank rows matching any term
+
+        ranking="count": number of distinct terms matched
+        ranking="bm25":  BM25F score over the indexed fields
+        mask: optional boolean array; rows where it is False are never returned
+        """
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        for term in set(terms):
+            if not term:
+                continue
+            if ranking == "bm25":
+                rows, contribution = self._term_bm25(term)
+                scores[rows] += contribution
+            else:
+                scores[self.term_rows(term)] += 1
+
+        if mask is not None:
+            scores[~mask] = 0
+
+        matched = np.flatnonzero(scores)
+        order = np.argsort(-scores[matched], kind='stable')[:top_k]
+        return [(int(matched[i]), float(scores[matched[i]])) for i in order]
+
+    def save(self, path: Path):
+        """Save the index to a .npz file (written to a temp file, then renamed into place)"""
+        path = Path(path)
+        tmp_path = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npz")
+        try:
+            np.savez(tmp_path,
+                     vocab_blob=np.frombuffer(self.vocab_blob.encode('utf-8'), dtype=np.uint8),
+                     postings_offsets=self.postings_offsets,
+                     postings_rows=self.postings_rows,
+                     postings_tf=self.postings_tf,
+                     field_lengths=self.field_lengths,
+                     fingerprint=np.array(self.fingerprint))
+            os.replace(tmp_path, path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    @classmethod
+    def load(cls, path: Path) -> "InvertedIndex":
+        """Load an index saved with save()"""
+        with np.load(path) as data:
+            return cls(data['vocab_blob'].tobytes().decode('utf-8'),
+                       data['postings_offsets'], data['postings_rows'],
+                       data['postings_tf'], data['field_lengths'],
+                       str(data['fingerprint']))
+
+
+# =============================================================================
+# HELPER FUNCTIONS
+# =============================================================================
+
+def _field_tokens(df: pd.DataFrame, column: str) -> List[List[str]]:
+    """Lowercased whitespace tokens of one column, per row"""
+    if column not in df.columns:
+        return [[] for _ in range(len(df))]
+    return df[column].fillna('').astype(str).str.lower().str.split().tolist()
+
+
+def bm25_idf(doc_freq, n_docs: int):
+    """BM25 inverse document frequency (always positive)"""
+    return np.log(1 + (n_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+
+
+def corpus_fingerprint(df: pd.DataFrame, fields: List[str] = INDEX_FIELDS) -> str:
+    """Hash of the indexed text, used to detect a stale persisted index"""
+    digest = hashlib.sha1(str(len(df)).encode('utf-8'))
+    for column in fields:
+        if column in df.columns:
+            digest.update('\x1f'.join(df[column].fillna('').astype(str)).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def load_or_build_index(df: pd.DataFrame, path: Optional[Path] = None) -> InvertedIndex:
+    """Load a persisted index if it matches the corpus, else build (and save) one"""
+    if path is not None and path.exists():
+        try:
+            index = InvertedIndex.load(path)
+            if index.fingerprint == corpus_fingerprint(df):
+                return index
+        except Exception as e:
+            print(f"⚠️ Error loading keyword index: {e}")
+
+    index = InvertedIndex.build(df)
+
+    if path is not None:
+        try:
+            index.save(path)
+        except OSError as e:
+            print(f"⚠️ Could not save keyword index: {e}")
+
+    return index
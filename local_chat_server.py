@@ -0,0 +1,122 @@
+"""
+Local Chat Server
+Bhruhat Trayi AI Assistant by PraKul
+
+Minimal OpenAI-compatible stand-in for testing the chat tab without an
+API key or network access. It answers POST /v1/chat/completions (plain or
+streamed) with a canned reply that echoes the question, word by word.
+
+Usage:
+    python local_chat_server.py --port 8000 --delay 0.02
+    # config.py: OPENAI_BASE_URL = "http://localhost:8000/v1"
+"""
+
+import argparse
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+DEFAULT_PORT = 8000
+DEFAULT_DELAY = 0.02  # Seconds between streamed words
+MODEL_NAME = "local-stand-in"
+
+
+# =============================================================================
+# SERVER
+# =============================================================================
+
+def canned_reply(messages) -> str:
+    """Reply text for a conversation"""
+    question = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+    return (f"(Local stand-in) You asked: {question}\n\n"
+            f"This server does not read the ślokas; it only exercises the chat pipeline.\n\n"
+            f"📖 References: none")
+
+
+def make_handler(delay: float):
+    class ChatHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Keep-alive, like the real API
+
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self.send_error(404)
+                return
+
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            reply = canned_reply(request.get("messages", []))
+            created = int(time.time())
+
+            if request.get("stream"):
+                try:
+                    self._stream(reply, created)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # Client cancelled the stream
+            else:
+                self._send_json({
+                    "id": "chatcmpl-local", "object": "chat.completion", "created": created,
+                    "model": MODEL_NAME,
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": reply}}],
+                })
+
+        def _send_json(self, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _stream(self, reply: str, created: int):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            words = reply.split(" ")
+            for i, word in enumerate(words):
+                delta = {"content": word if i == 0 else " " + word}
+                self._event({"id": "chatcmpl-local", "object": "chat.completion.chunk",
+                             "created": created, "model": MODEL_NAME,
+                             "choices": [{"index": 0, "delta": delta, "finish_reason": None}]})
+                time.sleep(delay)
+
+            self._event({"id": "chatcmpl-local", "object": "chat.completion.chunk",
+                         "created": created, "model": MODEL_NAME,
+                         "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+            self._chunk(b"data: [DONE]\n\n")
+            self._chunk(b"")
+
+        def _event(self, payload):
+            self._chunk(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+
+        def _chunk(self, data: bytes):
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+        def log_message(self, format, *args):
+            pass
+
+    return ChatHandler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stand-in server for local testing")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--delay", type=float, default=DEFAULT_DELAY,
+                        help=f"seconds between streamed words (default: {DEFAULT_DELAY})")
+    args = parser.parse_args(argv)
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(args.delay))
+    print(f"✅ Local chat server on http://localhost:{args.port}/v1")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,8 @@ Generates specific prompts based on user roles:
 - Physician
 """
 
+from corpus_store import as_records
+
 
 # =============================================================================
 # HELPER FUNCTIONS FOR REFERENCE CODES
@@ -306,14 +308,14 @@ Display all ślokas in Devanāgarī only. Use IAST for terms within explanations
     return combined_prompt
 
 
-def format_slokas_for_prompt(slokas_df) -> str:
+def format_slokas_for_prompt(slokas) -> str:
     """
-    Format ślokas for prompt using Reference style.
+    Format ślokas (records or DataFrame) for prompt using Reference style.
     Example: Reference: Su.Sū.15/41
     """
     formatted = ""
     
-    for idx, row in slokas_df.iterrows():
+    for row in as_records(slokas):
         # Generate reference code
         samhita = get_samhita_abbrev(row['File Name'])
         sthana = get_sthana_abbrev(row['Sthana'])
@@ -0,0 +1,193 @@
+"""
+Response Cache Module
+Bhruhat Trayi AI Assistant by PraKul
+
+Persistent cache of chat answers, shared by every session and process:
+1. Keyed on a hash of the exact request - model settings, role system
+   prompt, search query, selected ślokas, conversation prefix and message
+2. Stored in a local SQLite file (WAL mode, safe across processes)
+3. Entries expire after a TTL; beyond the size limit the least recently
+   used answers are evicted
+
+With a low temperature the quick-prompt questions ("Explain simply",
+"Give Anvaya", ...) get the same answer for the same search, so a class
+searching the same topic needs one API call per question instead of one
+per student.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Import configuration
+try:
+    from config import CHAT_RESPONSE_CACHE, CHAT_RESPONSE_CACHE_TTL, CHAT_RESPONSE_CACHE_MAX_MB
+except ImportError:
+    CHAT_RESPONSE_CACHE = True
+    CHAT_RESPONSE_CACHE_TTL = 7 * 24 * 3600
+    CHAT_RESPONSE_CACHE_MAX_MB = 50
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+APP_DIR = Path(__file__).parent
+
+RESPONSE_CACHE_PATH = APP_DIR / "chat_response_cache.sqlite"
+
+# Answers are only cached when they are close to deterministic
+MAX_CACHEABLE_TEMPERATURE = 0.3
+
+# Eviction brings the cache down to this share of the size limit
+EVICTION_TARGET_RATIO = 0.9
+
+# Bump to invalidate every cached answer (e.g. after changing prompt formats)
+RESPONSE_CACHE_VERSION = 1
+
+
+# =============================================================================
+# RESPONSE CACHE CLASS
+# =============================================================================
+
+class ResponseCache:
+    """SQLite-backed answer cache with TTL and size-based LRU eviction"""
+
+    def __init__(self, path: Path = RESPONSE_CACHE_PATH, ttl: Optional[float] = CHAT_RESPONSE_CACHE_TTL,
+                 max_bytes: int = int(CHAT_RESPONSE_CACHE_MAX_MB * 1024 * 1024)):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    response TEXT NOT NULL,
+                    model TEXT,
+                    size INTEGER NOT NULL,
+                    created REAL NOT NULL,
+                    last_used REAL NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per operation: usable from any thread
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached answer for a request key (None if missing or expired)"""
+        now = time.time()
+        try:
+            with self._lock, self._connect() as conn:
+                row = conn.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None and (self.ttl is None or row[1] + self.ttl > now):
+                    conn.execute("UPDATE responses SET last_used = ?, hits = hits + 1 WHERE key = ?", (now, key))
+                    self.hits += 1
+                    return row[0]
+                if row is not None:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.misses += 1
+        except sqlite3.Error as e:
+            print(f"⚠️ Response cache read failed: {e}")
+        return None
+
+    def set(self, key: str, response: str, model: Optional[str] = None):
+        """Store an answer, then drop expired entries and evict beyond the size limit"""
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, model, size, created, last_used) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, response, model, size, now, now)
+                )
+                if self.ttl is not None:
+                    conn.execute("DELETE FROM responses WHERE created <= ?", (now - self.ttl,))
+                self._evict(conn)
+        except sqlite3.Error as e:
+            print(f"⚠️ Response cache write failed: {e}")
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Delete least recently used answers until under the size limit"""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        excess = total - int(self.max_bytes * EVICTION_TARGET_RATIO)
+        evicted, keys = 0, []
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_used"):
+            if evicted >= excess:
+                break
+            keys.append((key,))
+            evicted += size
+        conn.executemany("DELETE FROM responses WHERE key = ?", keys)
+
+    def clear(self):
+        """Drop all entries (counters are kept)"""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+
+    def stats(self) -> Dict:
+        """Size and hit/miss counters (this process)"""
+        with self._lock, self._connect() as conn:
+            entries, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+# =============================================================================
+# HELPER FUNCTIONS
+# =============================================================================
+
+def response_key(messages: List[Dict], **params) -> str:
+    """Hash of a chat request (messages plus model, temperature, max_tokens, ...)"""
+    payload = json.dumps([RESPONSE_CACHE_VERSION, sorted(params.items()), messages],
+                         ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def is_cacheable(temperature: float) -> bool:
+    return CHAT_RESPONSE_CACHE and temperature <= MAX_CACHEABLE_TEMPERATURE
+
+
+# Process-wide cache (the SQLite file is also shared between processes)
+_CACHE: Optional[ResponseCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """The shared response cache, or None if it is disabled or cannot be opened"""
+    global _CACHE
+
+    if not CHAT_RESPONSE_CACHE:
+        return None
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            try:
+                _CACHE = ResponseCache()
+            except sqlite3.Error as e:
+                print(f"⚠️ Response cache unavailable: {e}")
+                return None
+        return _CACHE
@@ -9,7 +9,10 @@ Requirements:
     pip install sentence-transformers numpy
 
 Usage:
-    python setup_embeddings.py
+    python setup_embeddings.py                  # asks before recreating
+    python setup_embeddings.py --incremental    # only encode new/edited ślokas
+    python setup_embeddings.py --full           # re-encode everything
+    python setup_embeddings.py --help           # all options
 
 Time: ~10-15 minutes for 25,000 ślokas (first run downloads model ~500MB)
 """
@@ -17,7 +20,14 @@ Time: ~10-15 minutes for 25,000 ślokas (first run downloads model ~500MB)
 import pandas as pd
 import numpy as np
 from pathlib import Path
+import argparse
+import hashlib
+import multiprocessing
+import os
 import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from vector_store import PRECISIONS, quantized_paths, save_array, save_quantized
 
 # =============================================================================
 # CONFIGURATION
@@ -32,6 +42,25 @@ EXCEL_PATH = APP_DIR / "all3_cleaned.xlsx"
 # Output file
 EMBEDDINGS_PATH = APP_DIR / "sloka_embeddings.npy"
 METADATA_PATH = APP_DIR / "sloka_metadata.parquet"
+HASHES_PATH = APP_DIR / "sloka_embedding_hashes.npy"  # For incremental builds
+ANN_INDEX_PATH = APP_DIR / "sloka_ann_index.npz"
+
+# Parallel encoding: per-shard checkpoints let an interrupted run resume
+SHARD_DIR = APP_DIR / "embedding_shards"
+SHARD_SIZE = 1000
+
+# Length-bucketed batching: batches hold about batch_size * BUCKET_REFERENCE_TOKENS
+# tokens, so short ślokas go in big batches and long passages in small ones
+BUCKET_REFERENCE_TOKENS = 128
+MAX_BATCH_MULTIPLIER = 8  # Largest batch = batch_size * this
+
+# Extra reduced-precision copy for the app: None, "float16" or "int8"
+# (set EMBEDDING_PRECISION in enhanced_search.py to use it)
+QUANTIZED_PRECISION = None
+
+# ANN index (see ann_index.py) - None = about 4 * sqrt(n) lists
+BUILD_ANN_INDEX = True
+ANN_N_LISTS = None
 
 # Model - multilingual model that understands Sanskrit/Hindi + English
 MODEL_NAME = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
@@ -92,36 +121,237 @@ def load_model():
     return model
 
 
+def token_lengths(model, texts):
+    """Token count of each text as the model will see it (truncated to max_seq_length)"""
+    max_length = getattr(model, "max_seq_length", None) or 512
+    tokenizer = getattr(model, "tokenizer", None)
+    if tokenizer is not None:
+        ids = tokenizer(list(texts), add_special_tokens=True, truncation=False)["input_ids"]
+        lengths = np.fromiter((len(x) for x in ids), dtype=np.int64, count=len(ids))
+    else:
+        lengths = np.fromiter((len(t.split()) + 2 for t in texts), dtype=np.int64, count=len(texts))
+    return np.clip(lengths, 1, max_length)
+
+
+def length_batches(lengths, batch_size=64):
+    """
+    Split texts into batches of similar length
+    
+    Returns (order, bounds): texts sorted by length, and [start, end) slices
+    of that order whose padded size stays within the token budget.
+    """
+    order = np.argsort(lengths, kind="stable")
+    sorted_lengths = lengths[order]
+    budget = batch_size * BUCKET_REFERENCE_TOKENS
+    max_batch = batch_size * MAX_BATCH_MULTIPLIER
+    
+    bounds = []
+    start = 0
+    while start < len(order):
+        end = start + 1
+        # Sorted ascending: the last text is the longest, so it sets the padding
+        while end < len(order) and end - start < max_batch and (end - start + 1) * sorted_lengths[end] <= budget:
+            end += 1
+        bounds.append((start, end))
+        start = end
+    return order, bounds
+
+
+def encode_bucketed(model, texts, batch_size=64, show_progress=False):
+    """Encode texts batch-by-batch in length order, returned in the original order"""
+    lengths = token_lengths(model, texts)
+    order, bounds = length_batches(lengths, batch_size)
+    
+    embeddings = None
+    padded_tokens = 0
+    report_every = max(1, len(bounds) // 10)
+    for i, (start, end) in enumerate(bounds, start=1):
+        rows = order[start:end]
+        batch = model.encode(
+            [texts[r] for r in rows],
+            batch_size=len(rows),
+            show_progress_bar=False,
+            convert_to_numpy=True
+        )
+        if embeddings is None:
+            embeddings = np.empty((len(texts), batch.shape[1]), dtype=np.float32)
+        embeddings[rows] = batch
+        padded_tokens += len(rows) * int(lengths[rows[-1]])
+        
+        if show_progress and (i % report_every == 0 or i == len(bounds)):
+            print(f"   {end:,}/{len(texts):,} ślokas ({i}/{len(bounds)} batches)")
+    
+    if embeddings is None:
+        embeddings = np.empty((0, 0), dtype=np.float32)
+    padding_efficiency = lengths.sum() / padded_tokens if padded_tokens else 1.0
+    return embeddings, len(bounds), padding_efficiency
+
+
 def create_embeddings(model, texts, batch_size=64):
-    """Create embeddings for all texts"""
+    """Create embeddings for all texts (length-bucketed batches, corpus order kept)"""
     print(f"🔢 Creating embeddings for {len(texts):,} ślokas...")
     print(f"   This may take 10-15 minutes...")
     
     start_time = time.time()
     
-    # Create embeddings in batches
-    embeddings = model.encode(
-        texts,
-        batch_size=batch_size,
-        show_progress_bar=True,
-        convert_to_numpy=True
-    )
+    embeddings, n_batches, efficiency = encode_bucketed(model, texts, batch_size, show_progress=True)
     
     elapsed = time.time() - start_time
     print(f"   ✅ Done in {elapsed/60:.1f} minutes!")
+    print(f"   {len(texts) / max(elapsed, 1e-9):,.1f} ślokas/sec, {n_batches:,} batches, "
+          f"{efficiency:.0%} of batch tokens are real (not padding)")
+    
+    return embeddings
+
+
+# -----------------------------------------------------------------------------
+# Parallel encoding (one model per worker process)
+# -----------------------------------------------------------------------------
+
+_WORKER_MODEL = None
+
+
+def _init_worker(threads):
+    """Pin torch threads and load the model once per worker process"""
+    global _WORKER_MODEL
+    
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["MKL_NUM_THREADS"] = str(threads)
+    
+    import torch
+    from sentence_transformers import SentenceTransformer
+    
+    torch.set_num_threads(threads)
+    _WORKER_MODEL = SentenceTransformer(MODEL_NAME)
+
+
+def _encode_shard(texts, path, batch_size):
+    """Encode one shard and write its checkpoint file atomically"""
+    embeddings, _, _ = encode_bucketed(_WORKER_MODEL, texts, batch_size)
+    tmp_path = path.with_suffix(".tmp.npy")
+    np.save(tmp_path, np.asarray(embeddings, dtype=np.float32))
+    os.replace(tmp_path, path)
+    return path
+
+
+def create_embeddings_parallel(texts, workers, batch_size=64, shard_size=SHARD_SIZE):
+    """
+    Encode texts across a process pool, one checkpoint file per shard
+    
+    Shard files are named after a hash of their texts, so a re-run with
+    the same input skips every shard that was already finished.
+    """
+    print(f"🔢 Creating embeddings for {len(texts):,} ślokas with {workers} workers...")
+    start_time = time.time()
+    
+    SHARD_DIR.mkdir(exist_ok=True)
+    shards = []
+    for i, start in enumerate(range(0, len(texts), shard_size)):
+        chunk = texts[start:start + shard_size]
+        digest = hashlib.sha1("\x1e".join(chunk).encode("utf-8")).hexdigest()[:12]
+        shards.append((chunk, SHARD_DIR / f"shard_{i:05d}_{digest}.npy"))
+    
+    pending = [(chunk, path) for chunk, path in shards if not path.exists()]
+    if len(pending) < len(shards):
+        print(f"   ♻️  Resuming: {len(shards) - len(pending)} of {len(shards)} shards already done")
+    
+    if pending:
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        print(f"   {len(pending)} shards, {threads} torch threads per worker")
+        
+        # spawn: workers must not inherit a forked torch runtime
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker, initargs=(threads,)) as pool:
+            futures = [pool.submit(_encode_shard, chunk, path, batch_size) for chunk, path in pending]
+            for done, future in enumerate(as_completed(futures), start=1):
+                future.result()
+                print(f"   Shard {done}/{len(pending)} done")
+    
+    # Merge shards in corpus order
+    embeddings = np.concatenate([np.load(path) for _, path in shards]) if shards else np.empty((0, 0))
+    
+    elapsed = time.time() - start_time
+    print(f"   ✅ Done in {elapsed/60:.1f} minutes! ({len(texts) / max(elapsed, 1e-9):,.1f} ślokas/sec)")
     
     return embeddings
 
 
-def save_embeddings(embeddings, df):
-    """Save embeddings and metadata"""
+def clear_shards():
+    """Delete shard checkpoints once the merged matrix is saved"""
+    if SHARD_DIR.exists():
+        for path in SHARD_DIR.glob("shard_*.npy"):
+            path.unlink()
+
+
+def hash_texts(texts):
+    """SHA-1 of each search text (identifies unchanged ślokas between builds)"""
+    return np.array([hashlib.sha1(t.encode('utf-8')).hexdigest() for t in texts])
+
+
+def load_previous_build():
+    """Embeddings and text hashes of the previous build, or None"""
+    if not EMBEDDINGS_PATH.exists() or not HASHES_PATH.exists():
+        return None
+    
+    embeddings = np.load(EMBEDDINGS_PATH)
+    hashes = np.load(HASHES_PATH)
+    if len(embeddings) != len(hashes):
+        print("   ⚠️ Previous build is inconsistent, ignoring it")
+        return None
+    
+    return embeddings, hashes
+
+
+def create_embeddings_incremental(texts, hashes, previous, encode):
+    """
+    Reuse embeddings of unchanged texts and encode only new/edited ones
+    
+    encode(texts) is called only if something actually needs encoding.
+    """
+    old_embeddings, old_hashes = previous
+    old_rows = {h: i for i, h in enumerate(old_hashes)}
+    
+    reuse = np.array([old_rows.get(h, -1) for h in hashes])
+    changed = np.flatnonzero(reuse < 0)
+    
+    print(f"♻️  Reusing {len(texts) - len(changed):,} unchanged ślokas, "
+          f"encoding {len(changed):,} new/edited")
+    
+    embeddings = np.empty((len(texts), old_embeddings.shape[1]), dtype=np.float32)
+    kept = reuse >= 0
+    embeddings[kept] = old_embeddings[reuse[kept]]
+    
+    if len(changed) > 0:
+        embeddings[changed] = encode([texts[i] for i in changed])
+    
+    return embeddings
+
+
+def save_embeddings(embeddings, df, quantized_precision=QUANTIZED_PRECISION, hashes=None):
+    """Save embeddings (plus an optional quantized copy) and metadata"""
     print("💾 Saving embeddings...")
     
-    # Save embeddings as numpy array
-    np.save(EMBEDDINGS_PATH, embeddings)
+    # Save normalized float32 rows so the app can memory-map the file as-is
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    embeddings = embeddings / (np.linalg.norm(embeddings, axis=1, keepdims=True) + 1e-8)
+    # Written beside the old file and renamed: running apps keep their memory map
+    save_array(EMBEDDINGS_PATH, embeddings)
     print(f"   Embeddings saved: {EMBEDDINGS_PATH}")
     print(f"   Size: {EMBEDDINGS_PATH.stat().st_size / (1024*1024):.1f} MB")
     
+    # Text hashes (lets the next run re-encode only changed ślokas)
+    if hashes is not None:
+        save_array(HASHES_PATH, hashes)
+    
+    # Reduced-precision copies (float16 = 1/2, int8 = 1/4 of the size): the
+    # requested one plus any existing ones, so none is left from an older build
+    precisions = [p for p in PRECISIONS if p != "float32" and
+                  (p == quantized_precision or quantized_paths(EMBEDDINGS_PATH, p)[0].exists())]
+    for precision in precisions:
+        quantized_path = save_quantized(embeddings, EMBEDDINGS_PATH, precision)
+        print(f"   {precision} copy saved: {quantized_path}")
+        print(f"   Size: {quantized_path.stat().st_size / (1024*1024):.1f} MB")
+    
     # Save metadata (for quick lookup)
     metadata = df[['File Name', 'Sthana', 'Chapter_Number', 'Sloka_Number_Int', 
                    'Sloka Text', 'IAST', 'Roman', 'ASCII']].copy()
@@ -131,46 +361,86 @@ def save_embeddings(embeddings, df):
     return True
 
 
+def build_ann_index(embeddings, n_lists=ANN_N_LISTS):
+    """Build and save the IVF index used for approximate search"""
+    from ann_index import IVFIndex
+    
+    print("🗂️  Building ANN index...")
+    start_time = time.time()
+    
+    index = IVFIndex.build(embeddings, n_lists=n_lists)
+    index.save(ANN_INDEX_PATH)
+    
+    elapsed = time.time() - start_time
+    print(f"   ✅ {index.n_lists} lists built in {elapsed:.1f} seconds")
+    print(f"   Index saved: {ANN_INDEX_PATH}")
+    
+    return index
+
+
 def test_semantic_search(model, embeddings, df, query="obesity treatment"):
     """Test the semantic search"""
     print(f"\n🧪 Testing semantic search...")
     print(f"   Query: '{query}'")
     
-    # Create query embedding
-    query_embedding = model.encode([query], convert_to_numpy=True)
-    
-    # Calculate cosine similarity
-    from numpy.linalg import norm
+    from vector_store import VectorStore
     
-    similarities = []
-    for i, emb in enumerate(embeddings):
-        sim = np.dot(query_embedding[0], emb) / (norm(query_embedding[0]) * norm(emb))
-        similarities.append(sim)
-    
-    # Get top 5 results
-    top_indices = np.argsort(similarities)[-5:][::-1]
+    # One matrix-vector product over the normalized rows
+    query_embedding = model.encode([query], convert_to_numpy=True)[0]
+    top_results = VectorStore(embeddings).search(query_embedding, top_k=5)
     
     print(f"\n   Top 5 Results:")
     print("   " + "-" * 60)
     
-    for idx in top_indices:
+    for idx, sim in top_results:
         row = df.iloc[idx]
-        sim = similarities[idx]
         print(f"   [{sim:.3f}] {row['File Name']} - {row['Sthana']} Ch.{row['Chapter_Number']}")
         print(f"           {row['Sloka Text'][:60]}...")
         print()
 
 
-def main():
+def parse_args(argv=None):
+    """Command-line options (all steps can run non-interactively)"""
+    parser = argparse.ArgumentParser(description="Create śloka embeddings for semantic search")
+    
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--incremental", action="store_true",
+                      help="re-encode only new or edited ślokas (falls back to a full build)")
+    mode.add_argument("--full", action="store_true",
+                      help="re-encode every śloka without asking")
+    
+    parser.add_argument("--batch-size", type=int, default=64,
+                        help="encoding batch size (default: 64)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="encoder processes; >1 encodes shards in parallel with resumable checkpoints")
+    parser.add_argument("--shard-size", type=int, default=SHARD_SIZE,
+                        help=f"ślokas per checkpoint shard (default: {SHARD_SIZE})")
+    parser.add_argument("--quantize", choices=["float16", "int8"], default=QUANTIZED_PRECISION,
+                        help="also save a reduced-precision copy")
+    parser.add_argument("--no-ann", action="store_true",
+                        help="do not build the ANN index")
+    parser.add_argument("--ann-lists", type=int, default=ANN_N_LISTS,
+                        help="number of ANN index lists (default: about 4 * sqrt(n))")
+    parser.add_argument("--skip-test", action="store_true",
+                        help="skip the sample queries at the end")
+    
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
     """Main setup function"""
+    args = parse_args(argv)
+    build_ann = BUILD_ANN_INDEX and not args.no_ann
+    
     print("=" * 70)
     print("🪷 Bhruhat Trayi AI Assistant - Semantic Search Setup")
     print("=" * 70)
     print()
     
     # Check if embeddings already exist
-    if EMBEDDINGS_PATH.exists():
+    if EMBEDDINGS_PATH.exists() and not (args.incremental or args.full):
         print(f"⚠️  Embeddings already exist at: {EMBEDDINGS_PATH}")
+        print("   Tip: use --incremental to encode only new/edited ślokas")
         response = input("   Recreate? (y/n): ").lower()
         if response != 'y':
             print("   Skipping. Use existing embeddings.")
@@ -182,20 +452,43 @@ def main():
     # Step 2: Create searchable text
     df = create_searchable_text(df)
     texts = df['search_text'].tolist()
+    hashes = hash_texts(texts)
     
-    # Step 3: Load model
-    model = load_model()
+    # Step 3-4: Load model and create embeddings (only changed ones if incremental)
+    model = None
+    
+    def encode(batch):
+        nonlocal model
+        if args.workers > 1:
+            return create_embeddings_parallel(batch, args.workers, args.batch_size, args.shard_size)
+        if model is None:
+            model = load_model()
+        return create_embeddings(model, batch, args.batch_size)
+    
+    previous = load_previous_build() if args.incremental else None
+    if args.incremental and previous is None:
+        print("   ⚠️ No previous build with text hashes found. Doing a full build.")
+    
+    if previous is not None:
+        embeddings = create_embeddings_incremental(texts, hashes, previous, encode)
+    else:
+        embeddings = encode(texts)
     
-    # Step 4: Create embeddings
-    embeddings = create_embeddings(model, texts)
+    # Step 5: Save (then drop the shard checkpoints)
+    save_embeddings(embeddings, df, args.quantize, hashes)
+    clear_shards()
     
-    # Step 5: Save
-    save_embeddings(embeddings, df)
+    # Step 6: ANN index (for large corpora)
+    if build_ann:
+        build_ann_index(embeddings, args.ann_lists)
     
-    # Step 6: Test
-    test_semantic_search(model, embeddings, df, "obesity treatment")
-    test_semantic_search(model, embeddings, df, "diabetes management")
-    test_semantic_search(model, embeddings, df, "definition of health")
+    # Step 7: Test
+    if not args.skip_test:
+        if model is None:
+            model = load_model()
+        test_semantic_search(model, embeddings, df, "obesity treatment")
+        test_semantic_search(model, embeddings, df, "diabetes management")
+        test_semantic_search(model, embeddings, df, "definition of health")
     
     print("\n" + "=" * 70)
     print("✅ SETUP COMPLETE!")
@@ -204,6 +497,8 @@ def main():
     print("Files created:")
     print(f"   📊 {EMBEDDINGS_PATH}")
     print(f"   📋 {METADATA_PATH}")
+    if build_ann:
+        print(f"   🗂️  {ANN_INDEX_PATH}")
     print()
     print("Next steps:")
     print("   1. Restart your Streamlit app")
@@ -0,0 +1,291 @@
+"""
+Vector Store Module
+Bhruhat Trayi AI Assistant by PraKul
+
+Vectorized cosine similarity over the śloka embedding matrix:
+1. Rows are L2-normalized once at load time
+2. A query is scored with a single matrix-vector product
+3. Top-k is selected with argpartition (no full sort)
+
+Embedding files saved already normalized (setup_embeddings.py does this)
+are memory-mapped read-only, so several app processes on one host share
+the same page cache instead of each holding a private copy.
+
+Reduced-precision storage:
+- "float16": half-size copy of the normalized rows
+- "int8":    per-dimension scaled int8 codes (quarter size)
+Quantized rows are scored directly (dequantized in cache-sized chunks);
+the top candidates can then be rescored against the float32 matrix.
+"""
+
+import os
+import numpy as np
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+# Rows checked when deciding whether a file is already normalized
+NORM_CHECK_ROWS = 256
+NORM_TOLERANCE = 1e-3
+
+# Storage precisions and how quantized matrices are scored
+PRECISIONS = ["float32", "float16", "int8"]
+SCORE_CHUNK_ROWS = 4096   # Rows dequantized per matrix product
+RESCORE_FACTOR = 4        # Quantized candidates rescored per requested result
+
+
+# =============================================================================
+# VECTOR STORE CLASS
+# =============================================================================
+
+class VectorStore:
+    """Pre-normalized embedding matrix with fast top-k cosine search"""
+
+    def __init__(self, embeddings: np.ndarray, normalized: bool = False,
+                 scale: Optional[np.ndarray] = None,
+                 full_precision: Optional[np.ndarray] = None):
+        if normalized:
+            # Keep as-is (may be a read-only memory map)
+            self.vectors = embeddings
+        else:
+            self.vectors = normalize_rows(np.asarray(embeddings, dtype=np.float32))
+
+        # Per-dimension scale of int8 codes, and float32 rows used for rescoring
+        self.scale = None if scale is None else np.asarray(scale, dtype=np.float32)
+        self.full_precision = full_precision
+
+    @classmethod
+    def load(cls, path: Path, mmap: bool = True) -> "VectorStore":
+        """
+        Load an embedding matrix saved with np.save
+
+        Normalized float32 files are memory-mapped; anything else is
+        read and normalized into process memory.
+        """
+        embeddings = np.load(path, mmap_mode='r' if mmap else None)
+        if embeddings.dtype == np.float32 and is_normalized(embeddings):
+            return cls(embeddings, normalized=True)
+
+        if mmap:
+            print("⚠️ Embeddings are not normalized; loading into memory. "
+                  "Re-run setup_embeddings.py to enable memory mapping.")
+        return cls(np.asarray(embeddings))
+
+    @classmethod
+    def load_quantized(cls, path: Path, precision: str,
+                       full_precision_path: Optional[Path] = None) -> "VectorStore":
+        """
+        Load a matrix saved with save_quantized() (memory-mapped)
+
+        If full_precision_path is given, the float32 matrix is memory-mapped
+        too and used to rescore the top candidates; only the rows actually
+        rescored are ever paged in.
+        """
+        vector_path, scale_path = quantized_paths(path, precision)
+        vectors = np.load(vector_path, mmap_mode='r')
+        scale = np.load(scale_path) if precision == "int8" else None
+
+        full_precision = None
+        if full_precision_path is not None:
+            full_precision = VectorStore.load(full_precision_path).vectors
+
+        return cls(vectors, normalized=True, scale=scale, full_precision=full_precision)
+
+    def __len__(self) -> int:
+        return self.vectors.shape[0]
+
+    @property
+    def dim(self) -> int:
+        return self.vectors.shape[1]
+
+    @property
+    def precision(self) -> str:
+        return {np.dtype(np.float16): "float16", np.dtype(np.int8): "int8"}.get(self.vectors.dtype, "float32")
+
+    def _query_for(self, query: np.ndarray) -> np.ndarray:
+        """Fold the int8 scale into the query: (codes * scale) @ q == codes @ (scale * q)"""
+        return query if self.scale is None else query * self.scale
+
+    def _score_matrix(self, matrix: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """matrix @ query, dequantizing in chunks when not float32"""
+        if matrix.dtype == np.float32:
+            return matrix @ query
+
+        scores = np.empty(matrix.shape[0], dtype=np.float32)
+        for start in range(0, matrix.shape[0], SCORE_CHUNK_ROWS):
+            chunk = matrix[start:start + SCORE_CHUNK_ROWS].astype(np.float32)
+            scores[start:start + len(chunk)] = chunk @ query
+        return scores
+
+    def score(self, query_embedding: np.ndarray) -> np.ndarray:
+        """Cosine similarity of the query against every row"""
+        query = normalize_query_vector(query_embedding)
+        return self._score_matrix(self.vectors, self._query_for(query))
+
+    def score_rows(self, rows: np.ndarray, query_embedding: np.ndarray) -> np.ndarray:
+        """Cosine similarity of the query against selected rows"""
+        query = normalize_query_vector(query_embedding)
+        return self._score_matrix(self.vectors[rows], self._query_for(query))
+
+    def select(self, rows: np.ndarray, scores: np.ndarray, query_embedding: np.ndarray,
+               top_k: int) -> List[Tuple[int, float]]:
+        """
+        Top_k (row, similarity) pairs among scored candidate rows
+
+        Quantized scores are only used to shortlist top_k * RESCORE_FACTOR
+        candidates, which are then rescored in full precision if available.
+        """
+        if self.full_precision is None or self.precision == "float32":
+            best = top_k_indices(scores, top_k)
+            return [(int(rows[i]), float(scores[i])) for i in best]
+
+        shortlist = top_k_indices(scores, top_k * RESCORE_FACTOR)
+        # Sorted rows = sequential reads from the memory-mapped float32 file
+        exact_rows = np.sort(rows[shortlist])
+        exact = self.full_precision[exact_rows] @ normalize_query_vector(query_embedding)
+        best = top_k_indices(exact, top_k)
+        return [(int(exact_rows[i]), float(exact[i])) for i in best]
+
+    def search(self, query_embedding: np.ndarray, top_k: int = 50,
+               mask: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """
+        Return (row, similarity) pairs for the top_k rows, best first
+
+        mask: optional boolean array; rows where it is False are never returned
+        """
+        scores = self.score(query_embedding)
+        if mask is None:
+            return self.select(np.arange(len(scores)), scores, query_embedding, top_k)
+
+        # Only allowed rows reach select(), so the full-precision rescore
+        # can never bring a filtered-out row back
+        rows = np.flatnonzero(mask)
+        return self.select(rows, scores[rows], query_embedding, min(top_k, len(rows)))
+
+
+# =============================================================================
+# HELPER FUNCTIONS
+# =============================================================================
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize each row (zero rows stay zero)"""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / (norms + 1e-8)
+
+
+def normalize_query_vector(query_embedding: np.ndarray) -> np.ndarray:
+    """Query embedding as a normalized float32 vector"""
+    return normalize_rows(np.asarray(query_embedding, dtype=np.float32).reshape(1, -1))[0]
+
+
+def quantized_paths(path: Path, precision: str) -> Tuple[Path, Path]:
+    """File names of a quantized copy of an embeddings file (and its int8 scale)"""
+    path = Path(path)
+    vector_path = path.with_name(f"{path.stem}_{precision}.npy")
+    scale_path = path.with_name(f"{path.stem}_{precision}_scale.npy")
+    return vector_path, scale_path
+
+
+def quantize(vectors: np.ndarray, precision: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Quantize normalized rows
+
+    Returns (codes, scale): int8 codes use one scale per dimension
+    (max |value| / 127); float16 has no scale.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if precision == "float16":
+        return vectors.astype(np.float16), None
+    if precision == "int8":
+        scale = np.maximum(np.abs(vectors).max(axis=0), 1e-8) / 127.0
+        codes = np.clip(np.rint(vectors / scale), -127, 127).astype(np.int8)
+        return codes, scale.astype(np.float32)
+    raise ValueError(f"Unknown precision: {precision}")
+
+
+def save_array(path: Path, array: np.ndarray):
+    """
+    np.save to a temp file in the same directory, then rename it into place
+
+    Running app processes that memory-mapped the old file keep its inode;
+    truncating it in place would crash them with SIGBUS on their next read.
+    """
+    path = Path(path)
+    tmp_path = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npy")
+    try:
+        np.save(tmp_path, array)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def save_quantized(vectors: np.ndarray, path: Path, precision: str) -> Path:
+    """Save a quantized copy next to an embeddings file; returns its path"""
+    codes, scale = quantize(normalize_rows(np.asarray(vectors, dtype=np.float32)), precision)
+    vector_path, scale_path = quantized_paths(path, precision)
+    save_array(vector_path, codes)
+    if scale is not None:
+        save_array(scale_path, scale)
+    return vector_path
+
+
+def is_normalized(matrix: np.ndarray) -> bool:
+    """True if a sample of rows (spread over the matrix) has unit norm"""
+    if len(matrix) == 0:
+        return True
+    sample = np.unique(np.linspace(0, len(matrix) - 1, min(len(matrix), NORM_CHECK_ROWS)).astype(np.int64))
+    norms = np.linalg.norm(np.asarray(matrix[sample], dtype=np.float32), axis=1)
+    return bool(np.all(np.abs(norms - 1) < NORM_TOLERANCE))
+
+
+def top_k_indices(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """Indices of the top_k highest scores, sorted best first"""
+    n = len(scores)
+    if top_k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+
+    if top_k < n:
+        candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+    else:
+        candidates = np.arange(n)
+
+    # Stable sort keeps lower row ids first on ties
+    order = np.argsort(-scores[candidates], kind="stable")
+    return candidates[order]
+
+
+# =============================================================================
+# TEST
+# =============================================================================
+
+if __name__ == "__main__":
+    print("Vector Store - Filter Test")
+    print("=" * 60)
+
+    rng = np.random.default_rng(0)
+    full = normalize_rows(rng.standard_normal((2000, 64)).astype(np.float32))
+    mask = np.zeros(len(full), dtype=bool)
+    mask[rng.choice(len(full), 60, replace=False)] = True
+    query = rng.standard_normal(64).astype(np.float32)
+
+    failed = False
+    for precision in PRECISIONS:
+        if precision == "float32":
+            store = VectorStore(full, normalized=True)
+        else:
+            codes, scale = quantize(full, precision)
+            store = VectorStore(codes, normalized=True, scale=scale, full_precision=full)
+
+        # Fewer allowed rows than top_k * RESCORE_FACTOR: the case the rescore must respect
+        results = store.search(query, top_k=50, mask=mask)
+        outside = sum(not mask[row] for row, _ in results)
+        status = "✅" if outside == 0 and len(results) == 50 else "❌"
+        failed |= status == "❌"
+        print(f"{status} {precision:<8} {len(results)} results, {outside} outside the filter")
+
+    raise SystemExit(1 if failed else 0)
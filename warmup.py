@@ -0,0 +1,265 @@
+"""
+Warm-up Module
+Bhruhat Trayi AI Assistant by PraKul
+
+Loads everything a search needs before the first user asks:
+1. database      - the śloka table
+2. search_engine - shared engine + keyword index
+3. semantic      - embeddings, ANN index and SentenceTransformer model
+4. warm_queries  - a few synthetic searches (first-call costs, caches)
+
+Readiness and per-phase timings are exposed three ways:
+- get_warmup_state() for the UI
+- a JSON status file per app process, rewritten after every phase:
+  warmup_status_<server port>.json (warmup_status_pid<pid>.json if the
+  port is unknown); the standalone pre-start run writes WARMUP_STATUS_PATH
+- an optional HTTP health endpoint (HEALTH_CHECK_PORT):
+    GET /health -> 200 while the process is up
+    GET /ready  -> 200 once warm-up has finished, else 503
+
+Usage (pre-start step: downloads the model, builds the keyword index,
+fills the page cache):
+    python warmup.py
+"""
+
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+import pandas as pd
+
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+APP_DIR = Path(__file__).parent
+
+# Standalone runs (python warmup.py); app processes use status_path_for()
+WARMUP_STATUS_PATH = APP_DIR / "warmup_status.json"
+
+# Port of the health endpoint (None = disabled)
+HEALTH_CHECK_PORT = None
+
+# Synthetic queries run once every phase has loaded
+WARMUP_QUERIES = [
+    "definition of health",
+    "Prameha treatment",
+    "Jwara chikitsa",
+]
+WARMUP_MAX_RESULTS = 10
+
+WARMUP_PHASES = ["database", "search_engine", "semantic", "warm_queries"]
+
+
+# =============================================================================
+# WARM-UP STATE CLASS
+# =============================================================================
+
+class WarmupState:
+    """Thread-safe readiness flag plus status and timing of each phase"""
+
+    def __init__(self, status_path: Optional[Path] = WARMUP_STATUS_PATH):
+        self.status_path = status_path
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.ready = False
+        self.semantic_available = False
+        self.error: Optional[str] = None
+        self.phases: Dict[str, Dict] = {
+            name: {"status": "pending", "seconds": None} for name in WARMUP_PHASES
+        }
+        self._lock = threading.Lock()
+
+    @property
+    def current_phase(self) -> Optional[str]:
+        """First phase that has not finished yet"""
+        for name, phase in self.phases.items():
+            if phase["status"] in ("pending", "running"):
+                return name
+        return None
+
+    def run_phase(self, name: str, step: Callable):
+        """Run one phase, recording its status and duration"""
+        self._update(name, status="running")
+        start = time.perf_counter()
+        try:
+            result = step()
+        except Exception as e:
+            self._update(name, status="failed", seconds=time.perf_counter() - start, error=str(e))
+            raise
+        self._update(name, status="done", seconds=time.perf_counter() - start)
+        return result
+
+    def finish(self, semantic_available: bool = False, error: Optional[str] = None):
+        """Mark warm-up as finished (ready only if no phase failed)"""
+        with self._lock:
+            self.finished_at = time.time()
+            self.semantic_available = semantic_available
+            self.error = error
+            self.ready = error is None
+        self.write()
+
+    def _update(self, name: str, **fields):
+        with self._lock:
+            self.phases[name].update(fields)
+        self.write()
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                "ready": self.ready,
+                "semantic_available": self.semantic_available,
+                "current_phase": self.current_phase,
+                "error": self.error,
+                "pid": os.getpid(),
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "total_seconds": (self.finished_at or time.time()) - self.started_at,
+                "phases": {name: dict(phase) for name, phase in self.phases.items()},
+            }
+
+    def write(self):
+        """Atomically rewrite the status file (for health checks outside the process)"""
+        if self.status_path is None:
+            return
+        tmp_path = self.status_path.with_name(f"{self.status_path.stem}.{os.getpid()}.tmp")
+        try:
+            tmp_path.write_text(json.dumps(self.to_dict(), indent=2), encoding="utf-8")
+            os.replace(tmp_path, self.status_path)
+        except OSError as e:
+            print(f"⚠️ Could not write warm-up status: {e}")
+
+
+# =============================================================================
+# WARM-UP
+# =============================================================================
+
+def run_warmup(load_database: Callable[[], pd.DataFrame], state: WarmupState,
+               corpus_version=None) -> WarmupState:
+    """Run every warm-up phase in order (blocking)"""
+    from enhanced_search import get_search_engine
+
+    try:
+        df = state.run_phase("database", load_database)
+        engine = state.run_phase("search_engine", lambda: get_search_engine(df, corpus_version))
+        semantic_available = state.run_phase("semantic", engine.wait_until_ready)
+
+        def warm_queries():
+            modes = ["semantic", "keyword", "hybrid"] if semantic_available else ["keyword"]
+            for query in WARMUP_QUERIES:
+                for mode in modes:
+                    engine.search(query, WARMUP_MAX_RESULTS, mode=mode, use_cache=False)
+
+        state.run_phase("warm_queries", warm_queries)
+    except Exception as e:
+        print(f"⚠️ Warm-up failed: {e}")
+        state.finish(error=str(e))
+        return state
+
+    state.finish(semantic_available=semantic_available)
+    print(f"✅ Warm-up complete in {state.to_dict()['total_seconds']:.1f}s")
+    return state
+
+
+def status_path_for(server_port: Optional[int] = None) -> Path:
+    """Status file of one app process (replicas must not share a file)"""
+    suffix = server_port if server_port else f"pid{os.getpid()}"
+    return APP_DIR / f"warmup_status_{suffix}.json"
+
+
+# Process-wide warm-up (started once, whatever the number of sessions)
+_STATE: Optional[WarmupState] = None
+_STATE_LOCK = threading.Lock()
+
+
+def start_warmup(load_database: Callable[[], pd.DataFrame],
+                 health_port: Optional[int] = HEALTH_CHECK_PORT,
+                 server_port: Optional[int] = None, corpus_version=None) -> WarmupState:
+    """
+    Start warm-up in a background thread (no-op if already started)
+
+    server_port: the app's port, which names this process's status file.
+    corpus_version: passed to get_search_engine (see there).
+    """
+    global _STATE
+
+    with _STATE_LOCK:
+        if _STATE is None:
+            _STATE = WarmupState(status_path_for(server_port))
+            _STATE.write()
+            if health_port:
+                start_health_server(_STATE, health_port)
+            threading.Thread(target=run_warmup, args=(load_database, _STATE, corpus_version),
+                             name="warmup", daemon=True).start()
+        return _STATE
+
+
+def get_warmup_state() -> Optional[WarmupState]:
+    """State of the process-wide warm-up, or None if it was never started"""
+    return _STATE
+
+
+# =============================================================================
+# HEALTH ENDPOINT
+# =============================================================================
+
+def start_health_server(state: WarmupState, port: int, host: str = "0.0.0.0") -> Optional[ThreadingHTTPServer]:
+    """Serve /health and /ready from a daemon thread"""
+
+    class HealthHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/health":
+                code = 200
+            elif self.path == "/ready":
+                code = 200 if state.ready else 503
+            else:
+                self.send_error(404)
+                return
+
+            body = json.dumps(state.to_dict()).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # Probes every few seconds would flood the log
+
+    try:
+        server = ThreadingHTTPServer((host, port), HealthHandler)
+    except OSError as e:
+        print(f"⚠️ Health endpoint not started on port {port}: {e}")
+        return None
+
+    threading.Thread(target=server.serve_forever, name="health", daemon=True).start()
+    print(f"✅ Health endpoint on port {port} (/health, /ready)")
+    return server
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+if __name__ == "__main__":
+    from setup_embeddings import load_database
+
+    print("=" * 70)
+    print("🪷 Bhruhat Trayi AI Assistant - Warm-up")
+    print("=" * 70)
+
+    state = run_warmup(load_database, WarmupState())
+    status = state.to_dict()
+
+    print()
+    for name, phase in status["phases"].items():
+        seconds = f"{phase['seconds']:.2f}s" if phase["seconds"] is not None else "-"
+        print(f"   {name:<14} {phase['status']:<8} {seconds}")
+    print(f"   Semantic search: {'available' if status['semantic_available'] else 'unavailable'}")
+
+    raise SystemExit(0 if status["ready"] else 1)